@@ -0,0 +1,55 @@
+"""
+Memory used by the ACR nodes (without the AST nodes they hold).
+
+    python benchmarks/acr_memory.py [repeat]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from pynalyser import acr
+from pynalyser.main import parse_string
+
+from utils import make_source
+
+
+class ACRCollector(acr.NodeVisitor):
+    def __init__(self) -> None:
+        self.nodes: list = []
+
+    def visit(self, node: acr.NODE) -> None:
+        if isinstance(node, acr.ACR):
+            self.nodes.append(node)
+        super().visit(node)
+
+
+def deep_sizeof(node: acr.ACR) -> int:
+    size = sys.getsizeof(node)
+    instance_dict = getattr(node, "__dict__", None)
+    if instance_dict is not None:
+        size += sys.getsizeof(instance_dict)
+    return size
+
+
+def main(repeat: int = 200) -> None:
+    source = make_source(repeat)
+
+    gc.collect()
+    tracemalloc.start()
+    module = parse_string(source, "benchmark")
+    translated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    collector = ACRCollector()
+    collector.start(module)
+    nodes = collector.nodes + [module]
+
+    total = sum(deep_sizeof(node) for node in nodes)
+    print(f"ACR nodes:                {len(nodes)}")
+    print(f"bytes per ACR node:       {total / len(nodes):.1f}")
+    print(f"memory of the whole tree: {translated / 2**20:.2f} MiB")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,33 @@
+"""
+Time and memory taken by each analyser of the default pipeline.
+
+    python benchmarks/analysers.py [repeat]
+"""
+
+import sys
+
+from pynalyser.analysers import AnalysisContext
+from pynalyser.analysers.pipeline import default_pipe, run_pipeline
+from pynalyser.main import parse_string
+
+from utils import make_source
+
+
+def main(repeat: int = 200) -> None:
+    module = parse_string(make_source(repeat), "benchmark")
+    ctx = run_pipeline(AnalysisContext([module]), default_pipe, instrument=True)
+
+    print(
+        f"{'analyser':<16}{'wall, ms':>10}{'cpu, ms':>10}"
+        f"{'peak, KiB':>12}{'visits':>10}"
+    )
+    for stats in ctx.stats:
+        print(
+            f"{stats.analyser:<16}{stats.wall_time * 1000:>10.1f}"
+            f"{stats.cpu_time * 1000:>10.1f}{stats.memory_peak / 1024:>12.1f}"
+            f"{stats.visits:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,72 @@
+"""
+Linearization (set_bases) and is_subclass on a synthetic class hierarchy
+of the size of a big framework (Django has a few thousands of classes).
+
+    python benchmarks/inheritance.py [classes]
+"""
+
+import random
+import sys
+from typing import List, Tuple, Type
+
+from pynalyser.types.inheritance import Inheritable, is_subclass, set_bases
+
+from utils import timeit
+
+BASES = Tuple[Type[Inheritable], ...]
+
+
+def make_hierarchy(classes: int) -> List[Tuple[Type[Inheritable], BASES]]:
+    """
+    Every class has up to 4 bases: mostly the recent classes (deep chains
+    of models, views and forms) and sometimes mixins from anywhere
+    """
+
+    rng = random.Random(0)
+    hierarchy: List[Tuple[Type[Inheritable], BASES]] = []
+
+    for i in range(classes):
+        cls = type(f"Class_{i}", (Inheritable,), {})
+        bases: BASES = ()
+        if hierarchy:
+            recent = [entry for entry, _ in hierarchy[-50:]]
+            bases = tuple(rng.sample(recent, min(len(recent), rng.randint(1, 2))))
+            for _ in range(rng.randint(0, 2)):
+                mixin = rng.choice(hierarchy)[0]
+                if mixin not in bases:
+                    bases += (mixin,)
+        try:
+            set_bases(cls, bases)
+        except TypeError:  # the mro is inconsistent
+            bases = bases[:1]
+            set_bases(cls, bases)
+        hierarchy.append((cls, bases))
+
+    return hierarchy
+
+
+def main(classes: int = 3000) -> None:
+    hierarchy = make_hierarchy(classes)
+    mro_length = sum(len(cls.mro) for cls, _ in hierarchy) / classes
+
+    def linearize() -> None:
+        for cls, bases in hierarchy:
+            set_bases(cls, bases)
+
+    rng = random.Random(1)
+    pairs = [(rng.choice(hierarchy)[0], rng.choice(hierarchy)[0]) for _ in range(10000)]
+
+    def check() -> None:
+        for cls, other in pairs:
+            is_subclass(cls, other)
+
+    print(f"{'classes:':<22}{classes:>12}")
+    print(f"{'average mro length:':<22}{mro_length:>12.1f}")
+    best, _ = timeit(linearize)
+    print(f"{'set_bases:':<22}{classes / best:>12,.0f} classes per second")
+    best, _ = timeit(check)
+    print(f"{'is_subclass:':<22}{len(pairs) / best:>12,.0f} per second")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,55 @@
+"""
+Pipeline of small checkers, run in separate walks and in one fused walk.
+
+    python benchmarks/pipeline.py [repeat] [checkers]
+"""
+
+import sys
+from collections import Counter
+from typing import List
+
+from pynalyser import ast
+from pynalyser.analysers import Analyser, AnalysisContext
+from pynalyser.analysers.pipeline import run_pipeline
+from pynalyser.main import parse_string
+
+from utils import make_source, timeit
+
+
+class Checker(Analyser):
+    """Counts the interesting nodes per scope"""
+
+    def prepare(self, ctx: AnalysisContext) -> None:
+        super().prepare(ctx)
+        self.counter: Counter = ctx.results.setdefault(type(self).__name__, Counter())
+
+    def visit_Name(self, node: ast.Name) -> None:
+        self.counter[self.scope.name] += 1
+
+    def visit_Call(self, node: ast.Call) -> None:
+        self.counter[self.scope.name] += 1
+
+
+class FusableChecker(Checker):
+    fusable = True
+
+
+def make_pipeline(checker: type, count: int) -> List[Analyser]:
+    # different names, so the results don't collide
+    return [type(f"{checker.__name__}{i}", (checker,), {})() for i in range(count)]
+
+
+def main(repeat: int = 200, checkers: int = 5) -> None:
+    module = parse_string(make_source(repeat), "benchmark")
+
+    for checker in (Checker, FusableChecker):
+        best, _ = timeit(
+            lambda: run_pipeline(
+                AnalysisContext([module]), lambda: make_pipeline(checker, checkers)
+            )
+        )
+        print(f"{checker.__name__ + ':':<16}{best * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
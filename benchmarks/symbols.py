@@ -0,0 +1,69 @@
+"""
+Operations on the symbol tables with many symbols.
+
+    python benchmarks/symbols.py [symbols]
+"""
+
+import sys
+import tracemalloc
+
+from pynalyser.types import SymbolTableType
+
+from utils import timeit
+
+
+def main(symbols: int = 5000) -> None:
+    names = [f"name_{i}" for i in range(symbols)]
+
+    tracemalloc.start()
+    table = SymbolTableType(name="benchmark")
+    for name in names:
+        table[name].next_def()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    defined = [table.current_symbol(name) for name in names]
+
+    def proxy_get() -> None:
+        for name in names:
+            table[name].type
+
+    def proxy_set() -> None:
+        for name in names:
+            table[name].imported = False
+
+    def direct_get() -> None:
+        for name in names:
+            table.current_symbol(name).type
+
+    def direct_set() -> None:
+        for name in names:
+            table.current_symbol(name).imported = False
+
+    def symbol_get() -> None:
+        for symbol in defined:
+            symbol.type
+
+    def reset_and_define() -> None:
+        for _ in range(100):
+            table.reset()
+            table[names[0]].next_def()
+
+    print(f"{'symbols:':<33}{symbols:>12}")
+    print(f"{'memory:':<33}{size / symbols:>12.0f} bytes per symbol")
+    accesses = (
+        ("symtab[name].type", proxy_get),
+        ("symtab[name].imported =", proxy_set),
+        ("current_symbol(name).type", direct_get),
+        ("current_symbol(name).imported =", direct_set),
+        ("symbol.type", symbol_get),
+    )
+    for title, function in accesses:
+        best, _ = timeit(function)
+        print(f"{title + ':':<33}{symbols / best:>12,.0f} per second")
+    best, _ = timeit(reset_and_define)
+    print(f"{'reset + next_def:':<33}{100 / best:>12,.0f} per second")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,30 @@
+"""
+Throughput of the translation from AST to ACR.
+
+    python benchmarks/translation.py [repeat]
+"""
+
+import copy
+import sys
+
+from pynalyser import ast
+from pynalyser.main import parse_ast
+
+from utils import count_nodes, make_source, timeit
+
+
+def main(repeat: int = 200) -> None:
+    tree = ast.parse(make_source(repeat))
+    # parse_ast mutates the tree, so every run gets it's own copy
+    trees = [copy.deepcopy(tree) for _ in range(5)]
+
+    best, module = timeit(lambda: parse_ast(trees.pop(), "benchmark"))
+    nodes = count_nodes(module)  # type: ignore
+
+    print(f"nodes:            {nodes}")
+    print(f"best time:        {best * 1000:.1f} ms")
+    print(f"nodes per second: {nodes / best:,.0f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
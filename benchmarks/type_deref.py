@@ -0,0 +1,54 @@
+"""
+Operations on the types.
+
+    python benchmarks/type_deref.py [chain]
+"""
+
+import sys
+
+from pynalyser.symbol import Symbol
+from pynalyser.types import BinOpType, CompareOpType, FloatType, IntType, SymbolType
+
+from utils import timeit
+
+
+def main(chain: int = 200) -> None:
+    # a_0 = 1; a_1 = a_0 + 1; ... the type of a_n refers to the chain of n symbols
+    symbols = [Symbol(type=IntType.make())]
+    types = []
+    for i in range(1, chain):
+        previous = SymbolType(f"a_{i - 1}", symbols[-1])
+        types.append(BinOpType(previous, "add", IntType.make()))
+        symbols.append(Symbol())
+    # BinOpType narrows the type of the symbol on the creation
+    for symbol, tp in zip(symbols[1:], types):
+        symbol.type = tp
+    last = SymbolType(f"a_{chain - 1}", symbols[-1])
+
+    def repeated() -> None:
+        for _ in range(100):
+            last.deref(report=True)
+
+    def changed() -> None:
+        for tp in (IntType.make(), FloatType.make()) * 50:
+            symbols[0].type = tp
+            last.deref(report=True)
+
+    int_, float_ = IntType.make(), FloatType.make()
+
+    def operations() -> None:
+        for _ in range(500):
+            BinOpType.do_binary_op(int_, "add", float_)
+            CompareOpType.do_compare_op(int_, "lt", int_)
+
+    print(f"{'chain:':<28}{chain:>12}")
+    best, _ = timeit(repeated)
+    print(f"{'deref:':<28}{100 / best:>12,.0f} per second")
+    best, _ = timeit(changed)
+    print(f"{'symbol.type = ...; deref:':<28}{100 / best:>12,.0f} per second")
+    best, _ = timeit(operations)
+    print(f"{'binary and compare ops:':<28}{1000 / best:>12,.0f} per second")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
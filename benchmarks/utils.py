@@ -0,0 +1,75 @@
+"""
+Things that help to write benchmarks
+"""
+
+import time
+from typing import Callable, Tuple
+
+from pynalyser import acr
+
+
+SNIPPET = '''
+import os
+from collections import defaultdict as dd
+
+CONSTANT_{i} = {i} * 2 + 1
+
+
+def function_{i}(a, b=1, *args, c, **kwargs):
+    total = 0
+    for j in range(a):
+        if j % 2 == 0 and b > j:
+            total += j * b
+        elif j > 10:
+            total -= [x * 2 for x in range(j)][0]
+        else:
+            continue
+    while total > 100:
+        total = total // 2
+    value = kwargs.get("key")
+    with open(os.devnull) as file:
+        data = {{k: v for k, v in kwargs.items()}}
+    return total, value, lambda y: y + CONSTANT_{i}
+
+
+class Class_{i}(object):
+    attribute = {{1, 2, 3}}
+
+    def method(self, x):
+        return function_{i}(x, c=self.attribute) if x else None
+
+    async def coroutine(self):
+        async with self as context:
+            async for item in context:
+                yield item
+'''
+
+
+def make_source(repeat: int) -> str:
+    return "".join(SNIPPET.format(i=i) for i in range(repeat))
+
+
+class NodeCounter(acr.NodeVisitor):
+    count: int = 0
+
+    def visit(self, node: acr.NODE) -> None:
+        self.count += 1
+        super().visit(node)
+
+
+def count_nodes(module: acr.Module) -> int:
+    counter = NodeCounter()
+    counter.start(module)
+    return counter.count
+
+
+def timeit(function: Callable[[], object], repeat: int = 5) -> Tuple[float, object]:
+    """The best time out of the `repeat` runs and the last result"""
+
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
@@ -0,0 +1,103 @@
+"""
+Throughput of the acr.NodeVisitor (visits per second).
+
+    python benchmarks/visit.py [repeat]
+"""
+
+import sys
+from typing import Any
+
+from pynalyser import acr, ast
+from pynalyser.main import parse_string
+
+from utils import count_nodes, make_source, timeit
+
+
+class Visitor(acr.NodeVisitor):
+    """Typical visitor, handles a few node types"""
+
+    def visit_Name(self, node: ast.Name) -> None:
+        pass
+
+    def visit_Call(self, node: ast.Call) -> None:
+        pass
+
+    def visit_Function(self, node: acr.Function) -> None:
+        pass
+
+
+class IterativeVisitor(Visitor):
+    iterative = True
+
+
+class Transformer(acr.ACRCodeTransformer):
+    def visit_Name(self, node: ast.Name) -> ast.Name:
+        return node
+
+
+class IterativeTransformer(Transformer):
+    iterative = True
+
+
+class SparseVisitor(acr.NodeVisitor):
+    """Handles a node type that is found only in a part of the module"""
+
+    def visit_While(self, node: acr.While) -> None:
+        pass
+
+
+class PrunedSparseVisitor(SparseVisitor):
+    handled_types = ("While",)
+
+
+class GetattrVisitor(Visitor):
+    """The same, but looks up the method of the node on every visit"""
+
+    def visit(self, node: acr.NODE) -> Any:
+        visitor = getattr(self, "visit_" + type(node).__name__, None)
+
+        if visitor is None:
+            return self.acr_generic_visit(node)
+
+        result = visitor(node)
+        self.acr_generic_visit(node)
+        return result
+
+
+def main(repeat: int = 200) -> None:
+    module = parse_string(make_source(repeat), "benchmark")
+    nodes = count_nodes(module)
+    print(f"nodes: {nodes}")
+
+    visitors = (
+        Visitor,
+        IterativeVisitor,
+        GetattrVisitor,
+        Transformer,
+        IterativeTransformer,
+    )
+    for visitor in visitors:
+        best, _ = timeit(lambda: visitor().start(module))
+        print(f"{visitor.__name__ + ':':<22}{nodes / best:>12,.0f} visits per second")
+
+    best, _ = timeit(lambda: acr.annotate_subtree_types(module))
+    print(f"\nannotate_subtree_types: {best * 1000:>7.1f} ms")
+    for visitor in (SparseVisitor, PrunedSparseVisitor):
+        best, _ = timeit(lambda: visitor().start(module))
+        print(f"{visitor.__name__ + '.start:':<24}{best * 1000:>6.1f} ms")
+
+    best, _ = timeit(lambda: acr.NodeIndex.build(module))
+    print(f"\nNodeIndex.build:       {best * 1000:>8.1f} ms")
+    acr.NodeIndex.of(module)
+    best, _ = timeit(lambda: Visitor().start_indexed(module))
+    print(f"Visitor.start_indexed: {best * 1000:>8.1f} ms")
+
+    best, index = timeit(lambda: acr.LocationIndex.build(module))
+    print(f"\nLocationIndex.build:   {best * 1000:>8.1f} ms")
+    lines = range(1, index.spans[-1].end[0])  # type: ignore
+    best, _ = timeit(lambda: [index.at(line, 8) for line in lines])  # type: ignore
+    print(f"LocationIndex.at:      {len(lines) / best:>12,.0f} queries per second")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -1,3 +1,5 @@
 from .classes import *
 from .translation import translate_ast_to_acr
-from .utils import dump, NODE, NodeVisitor, ACRCodeTransformer
+from .utils import dump, NODE, NodeVisitor, ACRCodeTransformer, annotate_subtree_types
+from .index import IndexEntry, NodeIndex
+from .locations import LocationIndex, Span
@@ -1,10 +1,53 @@
-from typing import List, Optional, Tuple, TypeVar, Union
+from typing import (
+    TYPE_CHECKING,
+    ClassVar,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import attr
 
 from .. import ast
 
+if TYPE_CHECKING:
+    from .index import NodeIndex
+    from .locations import LocationIndex
+
 ACR_T = TypeVar("ACR_T")
+ACR_TYPE = TypeVar("ACR_TYPE", bound=Type["ACR"])
+
+
+# metadata of the fields with the data derived from the node (like caches
+# or indices), they are not a part of the `_fields` and should be defined
+# with `init=False, eq=False, repr=False` (mypy doesn't see through wrappers)
+INTERNAL = {"internal": True}
+
+
+def class_fields(cls: type) -> Tuple[str, ...]:
+    return tuple(
+        field.name
+        for field in attr.fields(cls)
+        if field.name not in cls._attributes  # type: ignore
+        and not field.metadata.get("internal")
+    )
+
+
+class ClassFields:
+    """Computes `_fields` of the ACR class on the access.
+    The final classes store them in the class (see :func:`slotted`),
+    so it's done once per class.
+
+    `attr.s` is applied after the class is created, so neither
+    metaclasses nor `__init_subclass__` can see the fields yet.
+    The base classes don't store them, otherwise the stored `_fields`
+    would hide the descriptor from the subclasses."""
+
+    def __get__(self, instance: object, owner: type) -> Tuple[str, ...]:
+        return class_fields(owner)
 
 
 @attr.s
@@ -12,43 +55,56 @@ class ACR:
     """The base class for each class of abstract representation of the code.
     Inherited classes can be dumped by :func:`acr.dump <pynalyser.acr.utils.dump>`,
     but for that to work properly inherited class should use `attr.s`.
+
+    All of the classes have empty `__slots__`, so they can be freely combined,
+    the storage is created only for the final classes by :func:`slotted`.
     """
 
-    _attributes: Tuple[str, ...] = attr.ib(init=False, default=())
-    _fields: Tuple[str, ...] = attr.ib(init=False, default=())
-    # _nonblock_fields: Tuple[str, ...] = ()
-    # _block_fields: Tuple[str, ...] = attr.ib(init=False, default=())
+    __slots__ = ()
+
+    _attributes: ClassVar[Tuple[str, ...]] = ()
+    _fields: ClassVar[Tuple[str, ...]] = ClassFields()  # type: ignore
+    # _nonblock_fields: ClassVar[Tuple[str, ...]] = ()
+    # _block_fields: ClassVar[Tuple[str, ...]] = ()
+
+    # ast.AST.__reduce__ creates the object by calling the class
+    # without arguments, and that fails for classes with required fields
+    __reduce__ = object.__reduce__
 
     # XXX: abc ? from_ast, to_ast
     # @classmethod
     # def from_ast(cls: Type[ACR_T], node: ast.AST) -> ACR_T:
     #     raise NotImplementedError
 
-    # FIXME: this should run only on class creation, so metaclasses?
-    def __attrs_post_init__(self) -> None:
-        _fields = list(attr.fields_dict(type(self)).keys())
 
-        for name in self._attributes:
-            _fields.remove(name)
-        _fields.remove("_attributes")
-        _fields.remove("_fields")
+def slotted(cls: ACR_TYPE) -> ACR_TYPE:
+    """Recreate the final (not inherited from) ACR class
+    with `__slots__` that hold all of it's fields.
+    Should be applied after `attr.s`."""
 
-        self._fields = tuple(_fields)
+    body = dict(cls.__dict__)
+    body.pop("__dict__", None)
+    body.pop("__weakref__", None)
+    body["__slots__"] = tuple(field.name for field in attr.fields(cls))
+    body["_fields"] = class_fields(cls)
 
-        # _nonblock_fields = []
-        # _block_fields = []  currently in Block
+    return type(cls)(cls.__name__, cls.__bases__, body)  # type: ignore
 
 
 @attr.s(auto_attribs=True)
 class Name(ACR):
+    __slots__ = ()
+
     name: str
     is_symbol: bool = attr.ib(init=False, default=False)
 
-    _attributes: Tuple[str, ...] = attr.ib(init=False, default=("is_symbol",))
+    _attributes: ClassVar[Tuple[str, ...]] = ("is_symbol",)
 
 
 @attr.s(auto_attribs=True)
 class Asyncable(ACR):
+    __slots__ = ()
+
     is_async: bool = attr.ib(kw_only=True)
 
 
@@ -114,7 +170,14 @@ CONTROL_FLOW = Union[  # TODO: not finished?
 
 
 # XXX: ControlFlowSomething? BlockContainer?
+@slotted
+@attr.s(auto_attribs=True, eq=False)
 class FlowContainer(ACR, List[CONTROL_FLOW]):
+    # see acr.utils.annotate_subtree_types
+    subtree_types: Optional[int] = attr.ib(
+        default=None, init=False, eq=False, repr=False, metadata=INTERNAL
+    )
+
     def get_code_block(self) -> "CodeBlock":
         if len(self):
             block = self[-1]
@@ -134,44 +197,63 @@ class FlowContainer(ACR, List[CONTROL_FLOW]):
         self.get_code_block().append(code)
 
 
+@slotted
+@attr.s(auto_attribs=True, eq=False)
 class CodeBlock(ACR, List[CODE]):
     """a.k.a. Basic block"""
 
-    pass
+    subtree_types: Optional[int] = attr.ib(
+        default=None, init=False, eq=False, repr=False, metadata=INTERNAL
+    )
 
 
-# @attr.s(auto_attribs=True)
+@attr.s(auto_attribs=True)
 class Block(ACR):
-    _block_fields: Tuple[str, ...] = ()
+    __slots__ = ()
 
-    def __attrs_post_init__(self) -> None:
-        super().__attrs_post_init__()
-        _fields = list(self._fields)
-        _fields.remove("_block_fields")
-        self._fields = tuple(_fields)
+    subtree_types: Optional[int] = attr.ib(
+        default=None, init=False, eq=False, repr=False, metadata=INTERNAL
+    )
+    _block_fields: ClassVar[Tuple[str, ...]] = ()
 
 
 @attr.s(auto_attribs=True)
 class BodyBlock(Block):
+    __slots__ = ()
+
     body: FlowContainer = attr.ib(factory=FlowContainer, init=False)
-    _block_fields: Tuple[str, ...] = attr.ib(init=False, default=("body",))
+    _block_fields: ClassVar[Tuple[str, ...]] = ("body",)
 
 
 @attr.s(auto_attribs=True)
 class Scope(Name, BodyBlock):
+    __slots__ = ()
+
     enclosing: bool = attr.ib(init=False, default=False)
 
 
+@slotted
+@attr.s(auto_attribs=True)
 class Module(Scope):
     """`name` is the name of the file that this module belongs to"""
 
     # path?
     # XXX: is_symbol = True?
-    pass
+
+    # see acr.index.NodeIndex.of
+    node_index: Optional["NodeIndex"] = attr.ib(
+        default=None, init=False, eq=False, repr=False, metadata=INTERNAL
+    )
+    # see acr.locations.LocationIndex.of
+    location_index: Optional["LocationIndex"] = attr.ib(
+        default=None, init=False, eq=False, repr=False, metadata=INTERNAL
+    )
 
 
 @attr.s(auto_attribs=True)
 class ACRWithAttributes(ACR):
+    __slots__ = ()
+
     lineno: int = attr.ib(kw_only=True)
     col_offset: int = attr.ib(kw_only=True)
     # TODO: make end_lineno and end_col_offset required fields
@@ -180,22 +262,31 @@ class ACRWithAttributes(ACR):
     end_lineno: Optional[int] = attr.ib(default=None, kw_only=True)
     end_col_offset: Optional[int] = attr.ib(default=None, kw_only=True)
 
-    _attributes: Tuple[str, ...] = attr.ib(
-        init=False, default=("lineno", "col_offset", "end_lineno", "end_col_offset")
+    _attributes: ClassVar[Tuple[str, ...]] = (
+        "lineno",
+        "col_offset",
+        "end_lineno",
+        "end_col_offset",
     )
 
 
 @attr.s(auto_attribs=True)
 class ScopeWithAttributes(ACRWithAttributes, Scope):
-    _attributes: Tuple[str, ...] = attr.ib(
-        init=False,
-        default=("lineno", "col_offset", "end_lineno", "end_col_offset", "is_symbol"),
+    __slots__ = ()
+
+    _attributes: ClassVar[Tuple[str, ...]] = (
+        "lineno",
+        "col_offset",
+        "end_lineno",
+        "end_col_offset",
+        "is_symbol",
     )
 
 
 # we don't care about 'type_ignores'
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class Class(ScopeWithAttributes):
     bases: List[ast.expr]  # parent-classes
@@ -206,6 +297,7 @@ class Class(ScopeWithAttributes):
     is_symbol: bool = attr.ib(init=False, default=True)
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class Function(ScopeWithAttributes, Asyncable):
     args: ast.arguments = attr.ib(factory=ast.arguments)
@@ -215,6 +307,7 @@ class Function(ScopeWithAttributes, Asyncable):
     enclosing: bool = attr.ib(init=False, default=True)
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class Lambda(ScopeWithAttributes, ast.expr):
     name: str = attr.ib(default="<lambda>", init=False)
@@ -223,32 +316,40 @@ class Lambda(ScopeWithAttributes, ast.expr):
 
 @attr.s(auto_attribs=True)
 class Comprehension(ScopeWithAttributes, ast.expr):
+    __slots__ = ()
+
     # XXX: shouldn't have `body` from Scope,
     # but removing this will bring currently unneeded refactoring
     generators: List[ast.comprehension] = attr.ib(kw_only=True)
-    _block_fields: Tuple[str, ...] = attr.ib(init=False, default=())
+    _block_fields: ClassVar[Tuple[str, ...]] = ()
 
 
 @attr.s(auto_attribs=True)
 class EltComprehension(Comprehension):
+    __slots__ = ()
+
     elt: ast.expr
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class ListComp(EltComprehension):
     name: str = attr.ib(init=False, default="<listcomp>")
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class SetComp(EltComprehension):
     name: str = attr.ib(init=False, default="<setcomp>")
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class GeneratorExp(EltComprehension):
     name: str = attr.ib(init=False, default="<genexpr>")
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class DictComp(Comprehension):
     key: ast.expr
@@ -256,19 +357,22 @@ class DictComp(Comprehension):
     name: str = attr.ib(init=False, default="<dictcomp>")
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class MatchCase(BodyBlock):
     pattern: ast.pattern
     guard: Optional[ast.expr]
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class Match(ACRWithAttributes, Block):
     subject: ast.expr
     cases: List[MatchCase] = attr.ib(init=False, factory=list)
-    _block_fields: Tuple[str, ...] = attr.ib(init=False, default=("cases",))
+    _block_fields: ClassVar[Tuple[str, ...]] = ("cases",)
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class With(ACRWithAttributes, BodyBlock, Asyncable):
     items: List[ast.withitem]
@@ -276,41 +380,51 @@ class With(ACRWithAttributes, BodyBlock, Asyncable):
 
 @attr.s(auto_attribs=True)
 class BodyElseBlock(BodyBlock):
+    __slots__ = ()
+
     orelse: FlowContainer = attr.ib(factory=FlowContainer, init=False)
-    _block_fields: Tuple[str, ...] = attr.ib(init=False, default=("body", "orelse"))
+    _block_fields: ClassVar[Tuple[str, ...]] = ("body", "orelse")
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class If(ACRWithAttributes, BodyElseBlock):
     test: ast.expr
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class ExceptHandler(ACRWithAttributes, BodyBlock):
     type: Optional[ast.expr]
     name: Optional[str]
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class Try(ACRWithAttributes, BodyElseBlock):
     handlers: List[ExceptHandler] = attr.ib(factory=list, init=False)
     finalbody: FlowContainer = attr.ib(factory=FlowContainer, init=False)
-    _block_fields: Tuple[str, ...] = attr.ib(
-        init=False, default=("body", "handlers", "orelse", "finalbody")
+    _block_fields: ClassVar[Tuple[str, ...]] = (
+        "body",
+        "handlers",
+        "orelse",
+        "finalbody",
     )
 
 
 @attr.s(auto_attribs=True)
 class Loop(ACRWithAttributes, BodyElseBlock):  # XXX: do we need this class?
-    pass
+    __slots__ = ()
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class For(Loop, Asyncable):
     target: ast.expr  # ? Union[ast.Name, ast.Tuple, ast.List]
     iter: ast.expr
 
 
+@slotted
 @attr.s(auto_attribs=True)
 class While(Loop):
     test: ast.expr
@@ -0,0 +1,88 @@
+import heapq
+from collections import defaultdict
+from itertools import count
+from typing import DefaultDict, Iterable, Iterator, List, NamedTuple, Optional
+
+from .classes import Block, Module, Scope
+from .utils import NODE, VISITOR_METHOD, NodeVisitor
+
+
+class IndexEntry(NamedTuple):
+    order: int  # position of the node in the order of the NodeVisitor
+    node: NODE
+    scope: Scope
+    block: Block
+
+
+def new_entry(values: tuple) -> IndexEntry:
+    # faster than IndexEntry(...), this is called for every node
+    return tuple.__new__(IndexEntry, values)  # type: ignore
+
+
+class NodeIndex:
+    """
+    Nodes of the module by their type, with the scope and the block
+    in which they are. It has exactly the nodes that `NodeVisitor` visits,
+    with the same `scope` and `block` that it has during their visit.
+
+    The index is not updated, when the tree changes,
+    in such case it should be dropped with `module.node_index = None`.
+    """
+
+    entries: DefaultDict[type, List[IndexEntry]]
+
+    def __init__(self) -> None:
+        self.entries = defaultdict(list)
+
+    @classmethod
+    def of(cls, module: Module) -> "NodeIndex":
+        """Index of the module, it's built on the first call and then reused"""
+
+        if module.node_index is None:
+            module.node_index = cls.build(module)
+        return module.node_index
+
+    @classmethod
+    def build(cls, module: Module) -> "NodeIndex":
+        return IndexBuilder().build(module)
+
+    def __getitem__(self, tp: type) -> List[IndexEntry]:
+        return self.entries.get(tp, [])
+
+    def __contains__(self, tp: type) -> bool:
+        return tp in self.entries
+
+    def types(self) -> Iterable[type]:
+        return self.entries.keys()
+
+    def nodes(self, *types: type) -> Iterator[IndexEntry]:
+        """Entries of all of the `types` (exact, not subclasses) in visiting order"""
+
+        return heapq.merge(*(self[tp] for tp in types))
+
+
+class IndexBuilder(NodeVisitor):
+    """Records every visited node, uses iterative traversal,
+    since it's noticeably cheaper than the recursion for this"""
+
+    iterative = True
+
+    entries: DefaultDict[type, List[IndexEntry]]
+    counter: Iterator[int]
+
+    def build(self, module: Module) -> NodeIndex:
+        index = NodeIndex()
+        self.entries = index.entries
+        self.counter = count()
+        self.start(module)
+        del self.entries, self.counter
+        return index
+
+    @classmethod
+    def find_visitor(cls, tp: type) -> Optional[VISITOR_METHOD]:
+        return cls.record
+
+    def record(self, node: NODE) -> None:
+        self.entries[type(node)].append(
+            new_entry((next(self.counter), node, self.scope, self.block))
+        )
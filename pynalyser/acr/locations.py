@@ -0,0 +1,147 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from .. import ast
+from .classes import ACR, Module, Scope
+from .utils import NODE
+
+# (line, column), lines start from 1 and columns from 0, as in the ast
+POSITION = Tuple[int, int]
+
+
+class Span(NamedTuple):
+    start: POSITION
+    end: POSITION  # exclusive, as `end_col_offset`
+    node: NODE
+    scope: Scope  # the innermost scope that has the node in it's subtree
+
+
+class LocationIndex:
+    """
+    Nodes of the module (both acr and ast) by their locations in the source.
+    Only the nodes with all of the `lineno`, `col_offset`, `end_lineno`
+    and `end_col_offset` are in the index, so on python 3.7 (which has no
+    end positions) the index is empty.
+
+    Spans of the nodes are flattened into the sorted segments, each with
+    the innermost span that covers it, so the point queries are done
+    with a single binary search.
+
+    The index is not updated, when the tree changes,
+    in such case it should be dropped with `module.location_index = None`.
+    """
+
+    spans: List[Span]  # by start, the outer spans before the inner ones
+
+    _starts: List[POSITION]  # of the `spans`
+    _bounds: List[POSITION]  # starts of the segments
+    _innermost: List[Optional[Span]]  # in the segments
+
+    def __init__(self, spans: List[Span]) -> None:
+        self.spans = spans
+        self._starts = [span.start for span in spans]
+        self._bounds = []
+        self._innermost = []
+
+        stack: List[Span] = []
+        for span in spans:
+            self._close(stack, span.start)
+            self._add_segment(span.start, span)
+            stack.append(span)
+        self._close(stack, (float("inf"), 0))  # type: ignore
+
+    def _add_segment(self, start: POSITION, span: Optional[Span]) -> None:
+        if self._bounds and self._bounds[-1] == start:
+            self._innermost[-1] = span
+        else:
+            self._bounds.append(start)
+            self._innermost.append(span)
+
+    def _close(self, stack: List[Span], position: POSITION) -> None:
+        """Pop the spans that end before the `position`"""
+
+        while stack and stack[-1].end <= position:
+            end = stack.pop().end
+            # spans that are not nested properly could end earlier
+            while stack and stack[-1].end <= end:
+                stack.pop()
+            self._add_segment(end, stack[-1] if stack else None)
+
+    @classmethod
+    def of(cls, module: Module) -> "LocationIndex":
+        """Index of the module, it's built on the first call and then reused"""
+
+        if module.location_index is None:
+            module.location_index = cls.build(module)
+        return module.location_index
+
+    @classmethod
+    def build(cls, module: Module) -> "LocationIndex":
+        spans = collect_spans(module)
+        spans.sort(key=lambda item: item[0])
+        return cls([span for _, span in spans])
+
+    def at(self, line: int, column: int) -> Optional[Span]:
+        """The innermost span that has the position in it"""
+
+        index = bisect_right(self._bounds, (line, column)) - 1
+        if index < 0:
+            return None
+        return self._innermost[index]
+
+    def scope_at(self, line: int, column: int) -> Optional[Scope]:
+        """The innermost scope that has the position in it"""
+
+        span = self.at(line, column)
+        if span is None:
+            return None
+        if isinstance(span.node, Scope):
+            return span.node
+        return span.scope
+
+    def within(self, start: POSITION, end: POSITION) -> List[Span]:
+        """Spans that are entirely in the range from `start` to `end` (exclusive)"""
+
+        result = []
+        for index in range(bisect_left(self._starts, start), len(self.spans)):
+            span = self.spans[index]
+            if span.start >= end:
+                break
+            if span.end <= end:
+                result.append(span)
+        return result
+
+
+def collect_spans(module: Module) -> List[Tuple[Any, Span]]:
+    """Spans of the module with their sort keys, in the preorder"""
+
+    spans: List[Tuple[Any, Span]] = []
+    stack: List[Tuple[Any, Scope]] = [(module, module)]
+    pop, push = stack.pop, stack.append
+
+    while stack:
+        node, scope = pop()
+
+        if isinstance(node, list):
+            for item in reversed(node):
+                push((item, scope))
+            continue
+
+        if not isinstance(node, (ACR, ast.AST)):
+            continue
+
+        end_lineno = getattr(node, "end_lineno", None)
+        end_col_offset = getattr(node, "end_col_offset", None)
+        if end_lineno is not None and end_col_offset is not None:
+            start = (node.lineno, node.col_offset)  # type: ignore
+            end = (end_lineno, end_col_offset)
+            # the outer spans first, the parents before the children
+            key = (start, (-end_lineno, -end_col_offset), len(spans))
+            spans.append((key, Span(start, end, node, scope)))
+
+        if isinstance(node, Scope):
+            scope = node
+        for name in reversed(node._fields):
+            push((getattr(node, name, None), scope))
+
+    return spans
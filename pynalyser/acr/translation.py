@@ -1,4 +1,5 @@
-from typing import NoReturn, Union
+import sys
+from typing import Any, Dict, NoReturn, Union
 
 from .. import ast
 from .classes import (
@@ -26,6 +27,15 @@ from .classes import (
 STMT_SCOPE = Union[ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef]
 
 
+def location(node: ast.AST) -> Dict[str, Any]:
+    return {
+        "lineno": node.lineno,  # type: ignore
+        "col_offset": node.col_offset,  # type: ignore
+        "end_lineno": getattr(node, "end_lineno", None),
+        "end_col_offset": getattr(node, "end_col_offset", None),
+    }
+
+
 # TODO: eliminate this class, it's still a kludge
 class ForBlocks(ast.AST):
     _fields = ("blocks",)
@@ -33,7 +43,12 @@ class ForBlocks(ast.AST):
 
 
 # XXX: restrict visit, so if there's no visit_x then raise exception
-class Translator(ast.NodeTransformer):
+class Translator(ast.AstNormalizer):
+    """Translates the ast to the acr.
+
+    It's also normalizes the ast along the way (see `ast.AstNormalizer`),
+    so there's no need for the separate pass over the tree."""
+
     container: FlowContainer
 
     #### Transformations used only for expr scopes ####
@@ -80,9 +95,7 @@ class Translator(ast.NodeTransformer):
         return node
 
     def visit_Match(self, node: ast.Match) -> ast.Match:
-        self.handle_block(
-            Match(node.subject, lineno=node.lineno, col_offset=node.col_offset), node
-        )
+        self.handle_block(Match(node.subject, **location(node)), node)
         return node
 
     def visit_With(self, node: ast.With) -> ast.With:
@@ -90,8 +103,7 @@ class Translator(ast.NodeTransformer):
             With(
                 node.items,
                 is_async=False,
-                lineno=node.lineno,
-                col_offset=node.col_offset,
+                **location(node),
             ),
             node,
         )
@@ -102,29 +114,24 @@ class Translator(ast.NodeTransformer):
             With(
                 node.items,
                 is_async=True,
-                lineno=node.lineno,
-                col_offset=node.col_offset,
+                **location(node),
             ),
             node,
         )
         return node
 
     def visit_If(self, node: ast.If) -> ast.If:
-        self.handle_block(
-            If(node.test, lineno=node.lineno, col_offset=node.col_offset), node
-        )
+        self.handle_block(If(node.test, **location(node)), node)
         return node
 
     def my_visit_ExceptHandler(self, node: ast.ExceptHandler) -> ExceptHandler:
         # should only be called from handle_block_without_appending
-        acr_handler = ExceptHandler(
-            node.type, node.name, lineno=node.lineno, col_offset=node.col_offset
-        )
+        acr_handler = ExceptHandler(node.type, node.name, **location(node))
         self.handle_block_without_appending(acr_handler, node)
         return acr_handler
 
     def visit_Try(self, node: ast.Try) -> ast.Try:
-        block = Try(lineno=node.lineno, col_offset=node.col_offset)
+        block = Try(**location(node))
         self.handle_block(block, node)
         return node
 
@@ -134,8 +141,7 @@ class Translator(ast.NodeTransformer):
                 node.target,
                 node.iter,
                 is_async=False,
-                lineno=node.lineno,
-                col_offset=node.col_offset,
+                **location(node),
             ),
             node,
         )
@@ -147,17 +153,14 @@ class Translator(ast.NodeTransformer):
                 node.target,
                 node.iter,
                 is_async=True,
-                lineno=node.lineno,
-                col_offset=node.col_offset,
+                **location(node),
             ),
             node,
         )
         return node
 
     def visit_While(self, node: ast.While) -> ast.While:
-        self.handle_block(
-            While(node.test, lineno=node.lineno, col_offset=node.col_offset), node
-        )
+        self.handle_block(While(node.test, **location(node)), node)
         return node
 
     #### expr scopes ####
@@ -169,7 +172,7 @@ class Translator(ast.NodeTransformer):
         return scope
 
     def visit_Lambda(self, node: ast.Lambda) -> Scope:
-        lamb = Lambda(node.args, lineno=node.lineno, col_offset=node.col_offset)
+        lamb = Lambda(node.args, **location(node))
         node.body = [ast.Expr(node.body)]  # type: ignore
         return self.handle_scope(lamb, node)
 
@@ -178,8 +181,7 @@ class Translator(ast.NodeTransformer):
             ListComp(
                 node.elt,
                 generators=node.generators,
-                lineno=node.lineno,
-                col_offset=node.col_offset,
+                **location(node),
             ),
             node,
         )
@@ -189,8 +191,7 @@ class Translator(ast.NodeTransformer):
             SetComp(
                 node.elt,
                 generators=node.generators,
-                lineno=node.lineno,
-                col_offset=node.col_offset,
+                **location(node),
             ),
             node,
         )
@@ -200,8 +201,7 @@ class Translator(ast.NodeTransformer):
             GeneratorExp(
                 node.elt,
                 generators=node.generators,
-                lineno=node.lineno,
-                col_offset=node.col_offset,
+                **location(node),
             ),
             node,
         )
@@ -212,8 +212,7 @@ class Translator(ast.NodeTransformer):
                 node.key,
                 node.value,
                 generators=node.generators,
-                lineno=node.lineno,
-                col_offset=node.col_offset,
+                **location(node),
             ),
             node,
         )
@@ -243,8 +242,7 @@ class Translator(ast.NodeTransformer):
             node.args,
             node.decorator_list,
             is_async=False,
-            lineno=node.lineno,
-            col_offset=node.col_offset,
+            **location(node),
         )
         self.handle_stmt_scope(func, node)
         return node
@@ -258,8 +256,7 @@ class Translator(ast.NodeTransformer):
             node.args,
             node.decorator_list,
             is_async=True,
-            lineno=node.lineno,
-            col_offset=node.col_offset,
+            **location(node),
         )
         self.handle_stmt_scope(func, node)
         return node
@@ -271,8 +268,7 @@ class Translator(ast.NodeTransformer):
                 node.bases,
                 node.keywords,
                 node.decorator_list,
-                lineno=node.lineno,
-                col_offset=node.col_offset,
+                **location(node),
             ),
             node,
         )
@@ -397,6 +393,15 @@ class Translator(ast.NodeTransformer):
 
     # Attribute
     # Subscript
+    if sys.version_info < (3, 9):
+        # ast.Tuple created from ast.ExtSlice has no locations,
+        # the same ones as fix_missing_locations would give it
+        def visit_Subscript(self, node: ast.Subscript) -> ast.Subscript:
+            self.generic_visit(node)
+            if not hasattr(node.slice, "lineno"):
+                ast.copy_location(node.slice, node)
+            return node
+
     # Starred
 
     # Name
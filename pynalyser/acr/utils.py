@@ -1,7 +1,24 @@
 from collections import defaultdict
-from typing import Any, Collection, List, NamedTuple, Optional, Tuple, TypeVar, Union
+from types import FunctionType
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Collection,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 from .. import ast
+from . import classes
 from .classes import ACR, Block, CodeBlock, FlowContainer, Module, Scope
 
 # Dumping
@@ -11,6 +28,7 @@ class Context(NamedTuple):
     annotate_fields: bool
     include_attributes: bool
     indent: Optional[str]
+    placeholders: Optional[Dict[int, str]] = None
 
 
 def dump(
@@ -19,17 +37,27 @@ def dump(
     include_attributes: bool = False,
     *,
     indent: Optional[Union[str, int]] = None,
+    placeholders: Optional[Dict[int, str]] = None,
 ) -> str:
+    """
+    `placeholders` are the strings by the ids of the nodes,
+    that are written instead of them
+    """
+
     if not isinstance(obj, (ACR, ast.AST, list, dict)):
         raise TypeError(  # XXX: should we force it?
             f"expected one of the AST / ACR / list / dict, " "got {type(obj).__name__}"
         )
     if indent is not None and not isinstance(indent, str):
         indent = " " * indent
-    return _format(obj, Context(annotate_fields, include_attributes, indent), lvl=0)[0]
+    ctx = Context(annotate_fields, include_attributes, indent, placeholders)
+    return _format(obj, ctx, lvl=0)[0]
 
 
 def _format(obj: Any, ctx: Context, lvl: int) -> Tuple[str, bool]:
+    if ctx.placeholders and id(obj) in ctx.placeholders:
+        return ctx.placeholders[id(obj)], True
+
     if ctx.indent is not None:
         lvl += 1
         prefix = "\n" + ctx.indent * lvl
@@ -125,6 +153,98 @@ def _format_ast_or_acr(
 
 NODE = Union[ACR, ast.AST]
 
+VISITOR_METHOD = Callable[[Any, NODE], Any]
+
+# kinds of the nodes, see node_kinds()
+SCOPE, BLOCK, FLOW_CONTAINER, CODE_BLOCK, AST, OTHER = range(6)
+
+_node_kinds: Dict[type, Tuple[int, int]] = {}
+# ast node types without fields (like ast.Load or ast.Add) met by node_kinds()
+_ast_leaves: Set[type] = set()
+
+
+def node_kinds(tp: type) -> Tuple[int, int]:
+    """Kinds of the node type for the `acr_generic_visit` (SCOPE, BLOCK or OTHER)
+    and for the `generic_visit` (AST, BLOCK, FLOW_CONTAINER, CODE_BLOCK or OTHER).
+    They can differ, e.g. `Lambda` is both `Scope` and `ast.AST`."""
+
+    kinds = _node_kinds.get(tp)
+    if kinds is not None:
+        return kinds
+
+    if issubclass(tp, Scope):
+        acr_kind = SCOPE
+    elif issubclass(tp, Block):
+        acr_kind = BLOCK
+    else:
+        acr_kind = OTHER
+
+    if issubclass(tp, ast.AST):
+        kind = AST
+        if not tp._fields:
+            _ast_leaves.add(tp)
+    elif issubclass(tp, Block):
+        kind = BLOCK
+    elif issubclass(tp, FlowContainer):
+        kind = FLOW_CONTAINER
+    elif issubclass(tp, CodeBlock):
+        kind = CODE_BLOCK
+    else:
+        kind = OTHER
+
+    kinds = _node_kinds[tp] = (acr_kind, kind)
+    return kinds
+
+
+# bits of the node types in the masks of `annotate_subtree_types`,
+# they are assigned in the order of the names, so they are the same
+# for every process (with the same version of python), unknown types
+# (e.g. defined outside of the pynalyser) share the UNKNOWN_TYPE bit
+UNKNOWN_TYPE = 1
+TYPE_BITS: Dict[str, int] = {
+    name: 1 << bit
+    for bit, name in enumerate(
+        sorted(
+            name
+            for module in (ast, classes)
+            for name, value in vars(module).items()
+            if isinstance(value, type) and issubclass(value, (ast.AST, ACR))
+        ),
+        start=1,
+    )
+}
+
+_type_bits: Dict[type, int] = {}
+
+
+def type_bit(tp: type) -> int:
+    bit = _type_bits.get(tp)
+    if bit is None:
+        bit = _type_bits[tp] = TYPE_BITS.get(tp.__name__, UNKNOWN_TYPE)
+    return bit
+
+
+def types_mask(names: Iterable[str]) -> int:
+    mask = 0
+    for name in names:
+        mask |= TYPE_BITS.get(name, UNKNOWN_TYPE)
+    return mask
+
+
+def _pruned(node: NODE, handled: int) -> bool:
+    """Neither the `node` nor the nodes under it are of the `handled` types"""
+
+    if not isinstance(node, ACR):
+        return False
+    mask = getattr(node, "subtree_types", None)
+    return mask is not None and not (mask | type_bit(type(node))) & handled
+
+
+# markers on the stack of the NodeVisitor.iterative_visit
+_RESTORE_SCOPE = object()
+_RESTORE_BLOCK = object()
+_LEAVE = object()
+
 
 class NodeVisitor:
     _ast_visitor = ast.NodeVisitor
@@ -135,21 +255,119 @@ class NodeVisitor:
     strict: bool = False
     auto_generic_visit: bool = True
 
+    # use `iterative_visit` instead of the recursion, so the depth of the tree
+    # is not limited by the recursion limit, the class can't override
+    # `visit`, `acr_generic_visit` or `generic_visit` then, since they would
+    # not be called for every node, `enter` and `leave` should be used instead
+    iterative: bool = False
+    _can_iterate: ClassVar[bool] = True
+    # `enter` or `leave` are overridden
+    _has_hooks: ClassVar[bool] = False
+
+    # number of the nodes the instance has visited by any of the traversals
+    visits: int = 0
+
+    # names of the node types that the visitor is interested in (usually
+    # the ones it has `visit_*` methods for), if they are set,
+    # `generic_visit` skips blocks, flow containers and code blocks
+    # that don't have such nodes, see `annotate_subtree_types`
+    handled_types: ClassVar[Optional[Collection[str]]] = None
+    _handled_mask: ClassVar[int] = 0
+
+    # node type -> "visit_*" method of the class or None if there's no such,
+    # filled by `visit`, every subclass gets it's own empty table,
+    # so methods added to the class after the first visit are not seen
+    _dispatch: ClassVar[Dict[type, Optional[VISITOR_METHOD]]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._dispatch = {}
+
+        if cls.handled_types is None:
+            cls._handled_mask = 0
+        else:
+            cls._handled_mask = types_mask(cls.handled_types)
+
+        # iterative_visit reproduces only the methods of the class it's defined in
+        owner = next(base for base in cls.__mro__ if "iterative_visit" in vars(base))
+        cls._can_iterate = all(
+            getattr(cls, name) is getattr(owner, name)
+            for name in ("visit", "acr_generic_visit", "generic_visit", "_ast_visitor")
+        )
+        if cls.iterative and not cls._can_iterate:
+            raise TypeError(
+                f"{cls.__name__} can't be iterative, it overrides the traversal, "
+                "use 'enter' and 'leave' instead"
+            )
+
+        cls._has_hooks = (
+            cls.enter is not NodeVisitor.enter or cls.leave is not NodeVisitor.leave
+        )
+
+    @classmethod
+    def find_visitor(cls, tp: type) -> Optional[VISITOR_METHOD]:
+        name = "visit_" + tp.__name__
+        method = getattr(cls, name, None)
+
+        if method is None or isinstance(method, FunctionType):
+            return method
+
+        # e.g. staticmethod, leave it to getattr
+        return lambda self, node: getattr(self, name)(node)
+
     def start(self, init_scope_block: Scope) -> Any:
+        if self._handled_mask and init_scope_block.subtree_types is None:
+            annotate_subtree_types(init_scope_block)
+
         self.scope = self.block = init_scope_block
         result = self.visit(init_scope_block)
 
         del self.scope, self.block
         return result
 
+    def start_indexed(self, module: Module) -> None:
+        """
+        Call `visit_*` methods for the nodes of the module in the same order
+        and with the same `scope` and `block` as `start` would, but without
+        walking the whole tree, nodes are taken from the `NodeIndex.of(module)`.
+        Visitor methods are the only thing that's called, so it works only
+        for the visitors that don't override traversal, `enter` or `leave`
+        and use `auto_generic_visit`.
+        """
+        from .index import NodeIndex  # index depends on this module
+
+        if not self._can_iterate or self._has_hooks or not self.auto_generic_visit:
+            raise TypeError(
+                f"{type(self).__name__} can't visit only the indexed nodes, "
+                "it overrides the traversal or doesn't use auto_generic_visit"
+            )
+
+        index = NodeIndex.of(module)
+
+        visitors: Dict[type, VISITOR_METHOD] = {}
+        for tp in index.types():
+            if tp not in self._dispatch:
+                self._dispatch[tp] = self.find_visitor(tp)
+            visitor = self._dispatch[tp]
+            if visitor is not None:
+                visitors[tp] = visitor
+
+        try:
+            for _, node, self.scope, self.block in index.nodes(*visitors):
+                self.visits += 1
+                visitors[type(node)](self, node)
+        finally:
+            del self.scope, self.block
+
     def acr_generic_visit(self, node: NODE) -> Any:
         # handle acr
-        if isinstance(node, Scope):
-            previous_scope = self.scope
-            self.scope = node
+        kind = (_node_kinds.get(type(node)) or node_kinds(type(node)))[0]
 
+        if kind == SCOPE:
+            previous_scope = self.scope
             previous_block = self.block
-            self.block = node
+            self.scope = node  # type: ignore
+            self.block = node  # type: ignore
 
             try:
                 return self.generic_visit(node)
@@ -157,9 +375,9 @@ class NodeVisitor:
                 self.scope = previous_scope
                 self.block = previous_block
 
-        if isinstance(node, Block):
+        if kind == BLOCK:
             previous_block = self.block
-            self.block = node
+            self.block = node  # type: ignore
 
             try:
                 return self.generic_visit(node)
@@ -197,50 +415,239 @@ class NodeVisitor:
     #     finally:
     #         self.block = previous_block
 
+    def no_visitor_error(self, node: NODE) -> ValueError:
+        return ValueError(
+            f"There are no 'visit_{type(node).__name__}' method. "
+            "You see this message because you're in strict mode. "
+            f"See {type(self).__name__}.strict"
+        )
+
+    def enter(self, node: NODE) -> None:
+        """Called before the visit of every node, the traversals
+        can't be overridden by the iterative visitors, but this can"""
+
+    def leave(self, node: NODE) -> None:
+        """Called after the visit of the node that was entered,
+        even if the visit has failed"""
+
     def visit(self, node: NODE) -> Any:
-        method = "visit_" + type(node).__name__
-        visitor = getattr(self, method, None)
-
-        if visitor is None:
-            if self.strict:
-                raise ValueError(
-                    f"There are no '{method}' method. "
-                    "You see this message because you're in strict mode. "
-                    f"See {type(self).__name__}.strict"
-                )
-
-            result = self.acr_generic_visit(node)
-        else:
-            result = visitor(node)
-            if self.auto_generic_visit:
-                self.acr_generic_visit(node)
+        if self.iterative and self._can_iterate:
+            return self.iterative_visit(node)
 
-        return result
+        self.visits += 1
+        hooks = self._has_hooks
+        if hooks:
+            self.enter(node)
+
+        try:
+            try:
+                visitor = self._dispatch[type(node)]
+            except KeyError:
+                visitor = self._dispatch[type(node)] = self.find_visitor(type(node))
+
+            if visitor is None:
+                if self.strict:
+                    raise self.no_visitor_error(node)
+
+                result = self.acr_generic_visit(node)
+            else:
+                result = visitor(self, node)
+                if self.auto_generic_visit:
+                    self.acr_generic_visit(node)
+
+            return result
+        finally:
+            if hooks:
+                self.leave(node)
 
     def generic_visit(self, node: NODE) -> Any:
-        if isinstance(node, ast.AST):
+        kind = (_node_kinds.get(type(node)) or node_kinds(type(node)))[1]
+
+        if kind == AST:
             return self._ast_visitor.generic_visit(self, node)  # type: ignore
 
-        if isinstance(node, Block):
-            for name in node._block_fields:
-                self.visit(getattr(node, name))
-            return node
+        handled = self._handled_mask
 
-        if isinstance(node, FlowContainer):
-            for item in node:
-                self.visit(item)
+        if kind == BLOCK:
+            for name in node._block_fields:  # type: ignore
+                child = getattr(node, name)
+                if not (handled and _pruned(child, handled)):
+                    self.visit(child)
             return node
 
-        if isinstance(node, CodeBlock):
-            for code in node:
-                self.visit(code)
+        if kind == FLOW_CONTAINER or kind == CODE_BLOCK:
+            for item in node:  # type: ignore
+                if not (handled and _pruned(item, handled)):
+                    self.visit(item)
             return node
 
         raise RuntimeError(f"Expected ACR or AST, but got {type(node).__name__}")
 
+    def iterative_visit(self, node: NODE) -> Any:
+        """Same as `visit`, but the nodes are visited from the explicit stack.
+        Nodes that visitor methods visit themselves are still visited
+        by the `visit`, so they are handled by the separate stack."""
+
+        result: Any = None
+        is_root = True
+        stack: List[Any] = [node]
+        pop, push, extend = stack.pop, stack.append, stack.extend
+        dispatch = self._dispatch
+        handled = self._handled_mask
+        iter_fields, AST_ = ast.iter_fields, ast.AST
+        hooks, enter, leave = self._has_hooks, self.enter, self.leave
+        # the node that is entered, but it's `_LEAVE` is not on the stack yet
+        entered = None
+
+        try:
+            while stack:
+                node = pop()
+
+                if node is _RESTORE_SCOPE:
+                    self.block = pop()
+                    self.scope = pop()
+                    continue
+                if node is _RESTORE_BLOCK:
+                    self.block = pop()
+                    continue
+                if node is _LEAVE:
+                    leave(pop())
+                    continue
+
+                self.visits += 1
+                if hooks:
+                    enter(node)
+                    entered = node
+
+                tp = type(node)
+                try:
+                    visitor = dispatch[tp]
+                except KeyError:
+                    visitor = dispatch[tp] = self.find_visitor(tp)
+
+                acr_kind, kind = _node_kinds.get(tp) or node_kinds(tp)
+
+                if visitor is None:
+                    if self.strict:
+                        raise self.no_visitor_error(node)
+                    if is_root:
+                        # what generic_visit returns
+                        result = None if kind == AST else node
+                else:
+                    value = visitor(self, node)
+                    if is_root:
+                        result = value
+                    if not self.auto_generic_visit:
+                        is_root = False
+                        if hooks:
+                            entered = None
+                            leave(node)
+                        continue
+
+                is_root = False
+
+                if hooks:
+                    # it's left after the scope and block are restored
+                    extend((node, _LEAVE))
+                    entered = None
+
+                if acr_kind == SCOPE:
+                    extend((self.scope, self.block, _RESTORE_SCOPE))
+                    self.scope = self.block = node  # type: ignore
+                elif acr_kind == BLOCK:
+                    extend((self.block, _RESTORE_BLOCK))
+                    self.block = node  # type: ignore
+
+                if kind == AST:
+                    if tp in _ast_leaves:
+                        continue
+                    children: List[ast.AST] = []
+                    for _, field in iter_fields(node):  # type: ignore
+                        if isinstance(field, list):
+                            for item in field:
+                                if isinstance(item, AST_):
+                                    children.append(item)
+                        elif isinstance(field, AST_):
+                            children.append(field)
+                    children.reverse()
+                    extend(children)
+                elif kind == BLOCK:
+                    for name in reversed(node._block_fields):  # type: ignore
+                        child = getattr(node, name)
+                        if not (handled and _pruned(child, handled)):
+                            push(child)
+                elif kind == FLOW_CONTAINER or kind == CODE_BLOCK:
+                    if handled:
+                        extend(
+                            item
+                            for item in reversed(node)  # type: ignore
+                            if not _pruned(item, handled)
+                        )
+                    else:
+                        extend(reversed(node))  # type: ignore
+                else:
+                    raise RuntimeError(
+                        f"Expected ACR or AST, but got {type(node).__name__}"
+                    )
+        except BaseException:
+            # restore scope and block and leave the nodes
+            # as the recursive visit would do
+            if entered is not None:
+                leave(entered)
+            while stack:
+                node = stack.pop()
+                if node is _RESTORE_SCOPE:
+                    self.block = stack.pop()
+                    self.scope = stack.pop()
+                elif node is _RESTORE_BLOCK:
+                    self.block = stack.pop()
+                elif node is _LEAVE:
+                    leave(stack.pop())
+            raise
+
+        return result
+
+
+class SubtreeTypesCollector(NodeVisitor):
+    iterative = True
+
+    mask: int = 0
+    # masks of the nodes that enclose the current one
+    outer: List[int]
+
+    def __init__(self) -> None:
+        self.outer = []
+
+    def enter(self, node: NODE) -> None:
+        self.outer.append(self.mask)
+        self.mask = 0
+
+    def leave(self, node: NODE) -> None:
+        if isinstance(node, (Block, FlowContainer, CodeBlock)):
+            node.subtree_types = self.mask
+        self.mask |= self.outer.pop() | type_bit(type(node))
+
+
+def annotate_subtree_types(block: Block) -> None:
+    """
+    Set `subtree_types` of the `block` and of the blocks, flow containers
+    and code blocks in it to the mask (see `types_mask`) of the types
+    of the nodes that the `NodeVisitor` visits under them.
+
+    It's done by `NodeVisitor.start` for the visitors with `handled_types`,
+    if the block doesn't have the mask yet. `ACRCodeTransformer` drops the masks
+    of the nodes it visits, so they are computed again by the next start from them,
+    masks of the blocks that enclose the transformed one are not dropped.
+    If the tree is changed in other ways, the function should be called again.
+    """
+
+    SubtreeTypesCollector().start(block)  # type: ignore
+
 
 class ACRCodeTransformer(NodeVisitor):
-    """Allows to change contents of the code (of the CodeBlock)"""
+    """Allows to change contents of the code (of the CodeBlock),
+    `handled_types` are not used to skip the code, `subtree_types`
+    of the visited blocks and flow containers are dropped (set to None)"""
 
     _ast_visitor = ast.NodeTransformer
 
@@ -249,11 +656,13 @@ class ACRCodeTransformer(NodeVisitor):
             return self._ast_visitor.generic_visit(self, node)  # type: ignore
 
         if isinstance(node, Block):
+            node.subtree_types = None  # type: ignore
             for name in node._block_fields:
                 self.visit(getattr(node, name))
             return node
 
         if isinstance(node, FlowContainer):
+            node.subtree_types = None
             for i, item in enumerate(node):
                 node[i] = self.visit(item)
             return node
@@ -271,3 +680,143 @@ class ACRCodeTransformer(NodeVisitor):
             return new_code_block
 
         raise RuntimeError(f"Expected ACR or AST, but got {type(node).__name__}")
+
+    def iterative_visit(self, node: NODE) -> Any:
+        """Same as `visit`, but the visits are generators (see `visit_frame`)
+        that are driven from the explicit stack, so they don't recurse.
+        Nodes that visitor methods visit themselves are still visited
+        by the `visit`, so they are handled by the separate stack."""
+
+        frames = [self.visit_frame(node)]
+        push, pop = frames.append, frames.pop
+        dispatch, hooks = self._dispatch, self._has_hooks
+        value: Any = None
+
+        try:
+            while frames:
+                try:
+                    child = frames[-1].send(value)
+                except StopIteration as stop:
+                    pop()
+                    value = stop.value
+                    continue
+
+                # shortcut for the most common leaves (like ast.Load or ast.Add),
+                # generic visit of the ast node without fields returns the node
+                tp = type(child)
+                if (
+                    tp in _ast_leaves
+                    and dispatch.get(tp, 0) is None
+                    and not self.strict
+                    and not hooks
+                ):
+                    self.visits += 1
+                    value = child
+                else:
+                    push(self.visit_frame(child))
+                    value = None
+        except BaseException:
+            # run the `finally` clauses from the innermost frame
+            while frames:
+                frames.pop().close()
+            raise
+
+        return value
+
+    def visit_frame(self, node: NODE) -> Generator[NODE, Any, Any]:
+        """`visit` with `acr_generic_visit` and `generic_visit` inlined,
+        which yields the nodes to visit and receives the results"""
+
+        self.visits += 1
+        hooks = self._has_hooks
+        if hooks:
+            self.enter(node)
+
+        try:
+            try:
+                visitor = self._dispatch[type(node)]
+            except KeyError:
+                visitor = self._dispatch[type(node)] = self.find_visitor(type(node))
+
+            if visitor is None:
+                if self.strict:
+                    raise self.no_visitor_error(node)
+            else:
+                result = visitor(self, node)
+                if not self.auto_generic_visit:
+                    return result
+
+            acr_kind, kind = _node_kinds.get(type(node)) or node_kinds(type(node))
+
+            previous_scope = previous_block = None
+            if acr_kind == SCOPE:
+                previous_scope, previous_block = self.scope, self.block
+                self.scope = self.block = node  # type: ignore
+            elif acr_kind == BLOCK:
+                previous_block = self.block
+                self.block = node  # type: ignore
+
+            try:
+                if kind == AST:
+                    generic: Any = node
+                    # the same as ast.NodeTransformer.generic_visit
+                    for field, old_value in ast.iter_fields(node):  # type: ignore
+                        if isinstance(old_value, list):
+                            new_values = []
+                            for value in old_value:
+                                if isinstance(value, ast.AST):
+                                    value = yield value
+                                    if value is None:
+                                        continue
+                                    elif not isinstance(value, ast.AST):
+                                        new_values.extend(value)
+                                        continue
+                                new_values.append(value)
+                            old_value[:] = new_values
+                        elif isinstance(old_value, ast.AST):
+                            new_node = yield old_value
+                            if new_node is None:
+                                delattr(node, field)
+                            else:
+                                setattr(node, field, new_node)
+
+                elif kind == BLOCK:
+                    generic = node
+                    node.subtree_types = None  # type: ignore
+                    for name in node._block_fields:  # type: ignore
+                        yield getattr(node, name)
+
+                elif kind == FLOW_CONTAINER:
+                    generic = node
+                    node.subtree_types = None  # type: ignore
+                    for i, item in enumerate(node):  # type: ignore
+                        node[i] = yield item  # type: ignore
+
+                elif kind == CODE_BLOCK:
+                    generic = CodeBlock()
+                    for code in node:  # type: ignore
+                        value = yield code
+                        if value is None:
+                            pass
+                        elif isinstance(value, (ast.AST, ACR)):
+                            generic.append(value)
+                        else:
+                            generic.extend(value)
+
+                else:
+                    raise RuntimeError(
+                        f"Expected ACR or AST, but got {type(node).__name__}"
+                    )
+            finally:
+                if acr_kind == SCOPE:
+                    self.scope = previous_scope  # type: ignore
+                    self.block = previous_block  # type: ignore
+                elif acr_kind == BLOCK:
+                    self.block = previous_block  # type: ignore
+
+            if visitor is None:
+                return generic
+            return result
+        finally:
+            if hooks:
+                self.leave(node)
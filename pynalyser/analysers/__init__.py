@@ -1,4 +1,4 @@
-from .definitions import DefinitionAnalyser, SymTabAnalyser
+from .definitions import DefinitionAnalyser, DefUseIndex, SymTabAnalyser
 from .scope import ScopeAnalyser
 from .tools import Analyser, AnalysisContext, collect_names
 from .type_inference import TypeInference
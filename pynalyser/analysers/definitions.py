@@ -1,14 +1,24 @@
 import sys
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import attr
 
 from .. import acr, ast
-from ..symbol import ScopeType
+from ..symbol import ScopeType, Symbol
 from ..types import Arg, Arguments, FunctionType, SymbolTableType
 from .tools import Analyser, AnalysisContext, collect_names
 
 
 class SymTabAnalyser(Analyser):
     symtab: SymbolTableType
+    incremental = True
+    iterative = True
+
+    # symbol tables of the scopes that enclose the current one
+    outer_symtabs: List[SymbolTableType]
+
+    requires: Optional[Tuple[str, ...]] = ()
+    provides: Tuple[str, ...] = ("SymTabAnalyser",)
 
     def analyse(self, ctx: AnalysisContext) -> None:
         type_name = SymTabAnalyser.__name__
@@ -20,32 +30,37 @@ class SymTabAnalyser(Analyser):
             )
 
         self.symtab = ctx.results[type_name] = SymbolTableType(name="WholeAnalysis")
+        self.outer_symtabs = []
         super().analyse(ctx)
 
-    def visit(self, node: acr.NODE) -> Any:
+    def reanalyse(self, ctx: AnalysisContext, scope: acr.Scope, index: int) -> None:
+        self.symtab = module_symbol_table(ctx)
+        self.symtab[scope.name].rewind(index)
+        self.outer_symtabs = []
+        super().reanalyse(ctx, scope, index)
+
+    def enter(self, node: acr.NODE) -> None:
         if isinstance(node, acr.Scope):
-            prev = self.symtab
             # this symbol is used in self.scope + progress the definition
             self.symtab[node.name].next_def()
-            try:
-                return super().visit(node)
-            finally:
-                self.symtab = prev
-        return super().visit(node)
+            self.outer_symtabs.append(self.symtab)
+
+    def leave(self, node: acr.NODE) -> None:
+        if isinstance(node, acr.Scope):
+            self.symtab = self.outer_symtabs.pop()
 
     def handle_arg(self, name: str) -> Arg:
-        symbol = self.symtab[name]
-        symbol.next_def()
+        symbol = self.symtab[name].next_def()
         symbol.is_arg = True
 
         if not symbol.change_scope(ScopeType.LOCAL, fail=False):
             raise SyntaxError(f"duplicate argument '{name}' in function definition")
 
-        return Arg(name, symbol.current_symbol)
+        return Arg(name, symbol)
 
     def handle_function(self, scope: Union[acr.Lambda, acr.Function]) -> None:
         args = Arguments()
-        symbol = self.symtab[scope.name]
+        symbol = self.symtab.current_symbol(scope.name)
         symbol.type = self.symtab = FunctionType(args)
         symbol.change_scope(ScopeType.LOCAL)
         symbol.holds_symbol_table = True
@@ -67,7 +82,7 @@ class SymTabAnalyser(Analyser):
             args.twostararg = self.handle_arg(scope.args.kwarg.arg)
 
     def handle_scope(self, node: acr.Scope) -> None:
-        self.symtab[node.name].type = self.symtab = SymbolTableType(
+        self.symtab.current_symbol(node.name).type = self.symtab = SymbolTableType(
             name=type(node).__name__
         )
 
@@ -96,7 +111,30 @@ class SymTabAnalyser(Analyser):
         self.handle_scope(node)
 
 
-def progress_symbol_defs(symtab: SymbolTableType, node: acr.NODE) -> None:
+def module_symbol_table(ctx: AnalysisContext) -> SymbolTableType:
+    """Symbol table of the entrypoint module"""
+
+    whole = ctx.results[SymTabAnalyser.__name__]
+    symtab = whole.current_symbol(ctx.modules[0].name).type
+    assert isinstance(symtab, SymbolTableType)
+    return symtab
+
+
+def evaluated_first(node: acr.NODE) -> Optional[acr.NODE]:
+    """The part of the node that is evaluated before the names it defines
+    are bound, e.g. the value of the assignment"""
+
+    if isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign, ast.NamedExpr)):
+        return node.value
+    if isinstance(node, acr.For):
+        return node.iter
+    return None
+
+
+def defined_names(node: acr.NODE) -> Tuple[List[str], bool]:
+    """Names defined by the `node` and whether they are defined
+    only if they are undefined (e.g. by the use)"""
+
     names: List[str] = []
     only_on_undef = False
 
@@ -116,20 +154,176 @@ def progress_symbol_defs(symtab: SymbolTableType, node: acr.NODE) -> None:
     # Delete, With, Match
     # Try cleans up after "except e as x"
 
+    return names, only_on_undef
+
+
+def progress_symbol_defs(symtab: SymbolTableType, node: acr.NODE) -> List[str]:
+    """Make the next definitions of the names defined by the `node` current,
+    return the names that got the new definitions"""
+
+    return progress_names(symtab, *defined_names(node))
+
+
+def progress_names(
+    symtab: SymbolTableType, names: List[str], only_on_undef: bool = False
+) -> List[str]:
+    """Same as `progress_symbol_defs` for the result of `defined_names`"""
+
+    defined = []
     for name in names:
         symbol = symtab[name]
         if only_on_undef and symbol.is_currently_defined:
             continue
         symbol.next_def()
+        defined.append(name)
+
+    return defined
+
+
+class SubtreeCollector(acr.NodeVisitor):
+    """Collects ids of all of the nodes of the scope, including it's own"""
+
+    iterative = True
+
+    nodes: Set[int]
+
+    def collect(self, scope: acr.Scope) -> Set[int]:
+        self.nodes = set()
+        self.start(scope)
+        return self.nodes
+
+    def enter(self, node: acr.NODE) -> None:
+        self.nodes.add(id(node))
+
+
+@attr.s(auto_attribs=True)
+class DefUseIndex:
+    """
+    Which definition each name sees and which names see each definition,
+    as the `DefinitionAnalyser(record_defs=True)` tracks them: the name sees
+    the definition that is current when the analyser visits it, so the
+    targets of the assignment see the definition it makes and the names
+    in it's value see the previous one (see `DefinitionAnalyser.previous_defs`).
+    Undefined names (e.g. builtins) get a definition that is not made
+    by any node.
+
+    Names and definitions are keyed by their identity,
+    values keep them alive, so the ids are not reused.
+    The ids are rebuilt, when the index is unpickled.
+    """
+
+    # id(name) -> (name, definition)
+    definitions: Dict[int, Tuple[ast.Name, Symbol]] = attr.ib(
+        factory=dict, repr=False
+    )
+    # id(definition) -> (definition, node that made it or None, names)
+    uses: Dict[int, Tuple[Symbol, Optional[acr.NODE], List[ast.Name]]] = attr.ib(
+        factory=dict, repr=False
+    )
+
+    def add_definition(self, symbol: Symbol, node: Optional[acr.NODE]) -> None:
+        # on the reanalysis the definition can be already used elsewhere
+        entry = self.uses.get(id(symbol))
+        self.uses[id(symbol)] = (symbol, node, [] if entry is None else entry[2])
+
+    def add_use(self, name: ast.Name, symbol: Symbol) -> None:
+        self.definitions[id(name)] = (name, symbol)
+
+        entry = self.uses.get(id(symbol))
+        if entry is None:
+            # e.g. arguments are defined by the SymTabAnalyser
+            entry = self.uses[id(symbol)] = (symbol, None, [])
+        entry[2].append(name)
+
+    def definition_of(self, name: ast.Name) -> Optional[Symbol]:
+        entry = self.definitions.get(id(name))
+        return None if entry is None else entry[1]
+
+    def uses_of(self, symbol: Symbol) -> List[ast.Name]:
+        entry = self.uses.get(id(symbol))
+        return [] if entry is None else entry[2]
+
+    def defined_by(self, symbol: Symbol) -> Optional[acr.NODE]:
+        """The node that made the definition"""
+
+        entry = self.uses.get(id(symbol))
+        return None if entry is None else entry[1]
+
+    def drop_subtree(self, scope: acr.Scope) -> None:
+        """
+        Drop the names in the `scope` and the definitions made in it,
+        e.g. when the scope is replaced by the reanalysis.
+        The definition made by the `scope` itself is kept with the uses
+        outside of it.
+        """
+
+        nodes = SubtreeCollector().collect(scope)
+        nodes.discard(id(scope))
+
+        symbols = set()
+        for key in nodes & self.definitions.keys():
+            _, symbol = self.definitions.pop(key)
+            symbols.add(id(symbol))
+
+        for key in symbols:
+            symbol, node, names = self.uses[key]
+            names = [name for name in names if id(name) not in nodes]
+            if node is None and not names:
+                del self.uses[key]  # e.g. an argument
+            else:
+                self.uses[key] = (symbol, node, names)
+
+        for key in [key for key, entry in self.uses.items() if id(entry[1]) in nodes]:
+            del self.uses[key]
+
+    def merge(self, other: "DefUseIndex") -> None:
+        self.definitions.update(other.definitions)
+        self.uses.update(other.uses)
+
+    # ids of the other process (e.g. of the `analyse_files_in_parallel`)
+    # point at nothing here
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "definitions": list(self.definitions.values()),
+            "uses": list(self.uses.values()),
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.definitions = {id(entry[0]): entry for entry in state["definitions"]}
+        self.uses = {id(entry[0]): entry for entry in state["uses"]}
 
 
 class DefinitionAnalyser(Analyser):
     symtab: SymbolTableType
+    incremental = True
+    iterative = True
+
+    # record the `DefUseIndex` in the results
     record_defs: bool = False
+    defs: DefUseIndex
+
+    requires: Optional[Tuple[str, ...]] = ("SymTabAnalyser",)
+
+    # names defined by the statement -> their definitions before it (None if
+    # it was undefined), they are seen in `evaluated_first` (`x = x + 1`)
+    previous_defs: Dict[str, Optional[Symbol]]
+    # `evaluated_first` of the last statement and it's `previous_defs`
+    _pending: Optional[Tuple[acr.NODE, Dict[str, Optional[Symbol]]]] = None
+    # node -> `symtab` and `previous_defs` to restore, when it's left
+    _saved: List[Tuple[acr.NODE, SymbolTableType, Dict[str, Optional[Symbol]]]]
 
     def __init__(self, record_defs: Optional[bool] = None) -> None:
         if record_defs is not None:
             self.record_defs = record_defs
+        if self.record_defs:
+            self.provides = self.provides + (DefinitionAnalyser.__name__,)
+
+    def prepare(self, ctx: AnalysisContext) -> None:
+        super().prepare(ctx)
+        if self.record_defs:
+            self.defs = ctx.results.setdefault(
+                DefinitionAnalyser.__name__, DefUseIndex()
+            )
 
     def analyse(self, ctx: AnalysisContext) -> None:
         type_name = SymTabAnalyser.__name__
@@ -139,25 +333,78 @@ class DefinitionAnalyser(Analyser):
 
         self.symtab = ctx.results[type_name]
         self.symtab.reset()
+        self.previous_defs, self._pending, self._saved = {}, None, []
         super().analyse(ctx)
 
-    def visit(self, node: acr.NODE) -> Any:
-        if isinstance(node, acr.Scope):
-            symbol = self.symtab[node.name]
-            symbol.next_def()
-
-            symtab = symbol.type
-            assert isinstance(symtab, SymbolTableType)
-
-            symtab.reset()
+    def reanalyse(self, ctx: AnalysisContext, scope: acr.Scope, index: int) -> None:
+        self.symtab = module_symbol_table(ctx)
+        self.symtab[scope.name].rewind(index)
+        self.previous_defs, self._pending, self._saved = {}, None, []
+        if self.record_defs:
+            self.defs = ctx.results[DefinitionAnalyser.__name__]
+        super().reanalyse(ctx, scope, index)
+
+    def seen_definition(self, node: ast.Name) -> Symbol:
+        """The definition seen by the name, see `previous_defs`"""
+
+        if isinstance(node.ctx, ast.Load) and node.id in self.previous_defs:
+            symbol = self.previous_defs[node.id]
+            if symbol is None:
+                # e.g. it's an unbound local
+                symbol = self.previous_defs[node.id] = Symbol()
+            return symbol
+        return self.symtab.current_symbol(node.id)
+
+    def enter(self, node: acr.NODE) -> None:
+        pending = self._pending
+        if pending is not None and pending[0] is node:
+            self._pending = None
+            self._saved.append((node, self.symtab, self.previous_defs))
+            self.previous_defs = {**self.previous_defs, **pending[1]}
 
-            prev = self.symtab
-            self.symtab = symtab
-
-            try:
-                return super().visit(node)
-            finally:
-                self.symtab = prev
-
-        progress_symbol_defs(self.symtab, node)
-        return super().visit(node)
+        if isinstance(node, acr.Scope):
+            self.enter_scope(node)
+            return
+
+        names, only_on_undef = defined_names(node)
+        part = evaluated_first(node) if names else None
+        if part is not None:
+            self._pending = part, {
+                name: self.symtab[name].current_symbol
+                if self.symtab[name].is_currently_defined
+                else None
+                for name in names
+            }
+
+        defined = progress_names(self.symtab, names, only_on_undef)
+        if self.record_defs and isinstance(node, ast.Name):
+            # it's only a placeholder definition, if the name was undefined
+            self.defs.add_use(node, self.seen_definition(node))
+        elif self.record_defs:
+            for name in defined:
+                self.defs.add_definition(self.symtab.current_symbol(name), node)
+
+    def enter_scope(self, node: acr.Scope) -> None:
+        definition = self.symtab[node.name].next_def()
+        if self.record_defs:
+            previous = self.defs.defined_by(definition)
+            if isinstance(previous, acr.Scope) and previous is not node:
+                # it's the reanalysis, the previous tree is replaced
+                self.defs.drop_subtree(previous)
+            self.defs.add_definition(definition, node)
+
+        symtab = definition.type
+        assert isinstance(symtab, SymbolTableType)
+
+        symtab.reset()
+
+        self._saved.append((node, self.symtab, self.previous_defs))
+        self.symtab = symtab
+        # the names of the enclosing scope are not affected by it's statements
+        self.previous_defs = {}
+
+    def leave(self, node: acr.NODE) -> None:
+        saved = self._saved
+        # the scope can be the `evaluated_first` too (`f = lambda: f`)
+        while saved and saved[-1][0] is node:
+            _, self.symtab, self.previous_defs = saved.pop()
@@ -0,0 +1,124 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from .. import acr
+from .pipeline import PIPE_FACTORY, default_pipe, run_pipeline
+from .tools import AnalysisContext
+
+
+class ScopeCollector(acr.NodeVisitor):
+    """Collects scopes directly enclosed by the module"""
+
+    scopes: List[acr.Scope]
+
+    def collect(self, module: acr.Module) -> List[acr.Scope]:
+        self.scopes = []
+        self.start(module)
+        return self.scopes
+
+    def visit(self, node: acr.NODE) -> Any:
+        if isinstance(node, acr.Scope) and not isinstance(node, acr.Module):
+            self.scopes.append(node)
+            return None
+        return super().visit(node)
+
+
+def fingerprint(
+    module: acr.Module, scopes: List[acr.Scope]
+) -> Tuple[int, List[int]]:
+    """
+    Return hash of the module without the bodies of the `scopes`
+    (the skeleton) and hashes of each of the `scopes`.
+    Locations are not included, so moved code is considered unchanged.
+    Every node is dumped once: the skeleton is made of the top-level
+    statements, where the `scopes` are replaced with placeholders.
+    """
+
+    placeholders = {
+        id(scope): f"<{type(scope).__name__} {scope.name}>" for scope in scopes
+    }
+    hashes = [hash(acr.dump(scope)) for scope in scopes]
+
+    statements: List[acr.NODE] = []
+    for item in module.body:
+        if isinstance(item, acr.CodeBlock):
+            statements.extend(item)
+        else:
+            statements.append(item)
+
+    skeleton = hash(
+        tuple(
+            hash(acr.dump(statement, placeholders=placeholders))
+            for statement in statements
+        )
+    )
+    return skeleton, hashes
+
+
+class IncrementalAnalysis:
+    """
+    Keeps the results of the previous analysis of the module and on
+    the update reanalyses only the scopes directly enclosed by the module
+    that have changed, the rest of the symbol tables are reused.
+
+    If anything outside of such scopes have changed or some of the
+    analysers do not support reanalysis, the whole module is analysed.
+    """
+
+    factory: PIPE_FACTORY
+    context: Optional[AnalysisContext]
+
+    # scopes reanalysed by the last update, None if it was the full analysis
+    reanalysed: Optional[List[acr.Scope]]
+
+    _skeleton: int
+    _hashes: List[int]
+
+    def __init__(self, factory: PIPE_FACTORY = default_pipe) -> None:
+        self.factory = factory
+        self.context = None
+        self.reanalysed = None
+
+    def update(self, module: acr.Module) -> AnalysisContext:
+        scopes = ScopeCollector().collect(module)
+        skeleton, hashes = fingerprint(module, scopes)
+        pipeline = self.factory()
+
+        if (
+            self.context is None
+            or self.context.modules[0].name != module.name
+            or self._skeleton != skeleton
+            or len(self._hashes) != len(hashes)
+            or not all(analyser.incremental for analyser in pipeline)
+        ):
+            self.context = run_pipeline(AnalysisContext([module]), lambda: pipeline)
+            self.reanalysed = None
+        else:
+            changed = self.changed_scopes(scopes, hashes)
+
+            self.context.modules[0] = module
+            for analyser in pipeline:
+                for scope, index in changed:
+                    analyser.reanalyse(self.context, scope, index)
+
+            self.reanalysed = [scope for scope, _ in changed]
+
+        self._skeleton = skeleton
+        self._hashes = hashes
+        return self.context
+
+    def changed_scopes(
+        self, scopes: List[acr.Scope], hashes: List[int]
+    ) -> List[Tuple[acr.Scope, int]]:
+        """Changed scopes and indices of their definitions in the module"""
+
+        changed = []
+        counts: Dict[str, int] = {}
+
+        for scope, old, new in zip(scopes, self._hashes, hashes):
+            index = counts.get(scope.name, 0)
+            counts[scope.name] = index + 1
+
+            if old != new:
+                changed.append((scope, index))
+
+        return changed
@@ -1,8 +1,18 @@
-from typing import Callable, List, Type
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Dict, List, Set, Type
 
 from .definitions import DefinitionAnalyser, SymTabAnalyser
 from .scope import ScopeAnalyser
-from .tools import Analyser, AnalysisContext
+from .tools import (
+    Analyser,
+    AnalyserStats,
+    AnalysisContext,
+    FusedAnalyser,
+    fuse_analysers,
+)
 from .type_inference import TypeInference
 
 
@@ -54,14 +64,156 @@ def insert_in_pipeline(
     return pipeline[:i] + [to_be_inserted] + pipeline[i:]
 
 
-def run_pipeline(ctx: AnalysisContext, factory: PIPE_FACTORY) -> AnalysisContext:
+def pending_analysers(ctx: AnalysisContext, pipeline: PIPELINE) -> PIPELINE:
+    """Analysers which have something to provide that is not completed yet"""
+
+    return [
+        analyser
+        for analyser in pipeline
+        if not analyser.provides or not ctx.completed.issuperset(analyser.provides)
+    ]
+
+
+def analyser_dependencies(ctx: AnalysisContext, pipeline: PIPELINE) -> List[Set[int]]:
+    """Indices of the analysers in the `pipeline` that each of them requires"""
+
+    providers: Dict[str, List[int]] = defaultdict(list)
+    for i, analyser in enumerate(pipeline):
+        for name in analyser.provides:
+            providers[name].append(i)
+
+    dependencies = []
+    for i, analyser in enumerate(pipeline):
+        if analyser.requires is None:
+            dependencies.append(set(range(i)))
+            continue
+
+        required: Set[int] = set()
+        for name in analyser.requires:
+            if name in providers:
+                required.update(j for j in providers[name] if j != i)
+            elif name not in ctx.completed:
+                raise ValueError(
+                    f"'{name}' is required by {type(analyser).__name__}, "
+                    "but it's not provided by any analyser in the pipeline"
+                )
+        dependencies.append(required)
+
+    return dependencies
+
+
+def cyclic_dependencies_error(pipeline: PIPELINE, done: Set[int]) -> ValueError:
+    names = ", ".join(
+        type(analyser).__name__ for i, analyser in enumerate(pipeline) if i not in done
+    )
+    return ValueError(f"Analysers have cyclic dependencies: {names}")
+
+
+def topological_order(dependencies: List[Set[int]]) -> List[int]:
+    """
+    Indices of the analysers, so each one comes after the ones it depends on,
+    otherwise the order of the pipeline is kept
+    """
+
+    order: List[int] = []
+    done: Set[int] = set()
+
+    while len(order) < len(dependencies):
+        for i, required in enumerate(dependencies):
+            if i not in done and required <= done:
+                done.add(i)
+                order.append(i)
+                break
+        else:
+            return order  # the rest have cyclic dependencies
+
+    return order
+
+
+def schedule(ctx: AnalysisContext, pipeline: PIPELINE) -> PIPELINE:
+    """
+    Order the analysers, so each one runs after the analysers that provide
+    what it `requires`, otherwise the order of the pipeline is kept.
+    Analysers that have everything they provide already completed are skipped.
+    """
+
+    pipeline = pending_analysers(ctx, pipeline)
+    order = topological_order(analyser_dependencies(ctx, pipeline))
+    if len(order) < len(pipeline):
+        raise cyclic_dependencies_error(pipeline, set(order))
+
+    return [pipeline[i] for i in order]
+
+
+def run_analyser(
+    ctx: AnalysisContext, analyser: Analyser, instrument: bool = False
+) -> None:
+    if not instrument:
+        analyser.analyse(ctx)
+        ctx.completed.update(analyser.provides)
+        return
+
+    if isinstance(analyser, FusedAnalyser):
+        visitors = analyser.analysers
+        name = "+".join(type(fused).__name__ for fused in visitors)
+    else:
+        visitors = [analyser]
+        name = type(analyser).__name__
+
+    visits = sum(visitor.visits for visitor in visitors)
+    if sys.version_info >= (3, 9):
+        tracemalloc.reset_peak()
+    memory = tracemalloc.get_traced_memory()[0]
+    wall_time, cpu_time = time.perf_counter(), time.thread_time()
+
+    analyser.analyse(ctx)
+
+    wall_time, cpu_time = time.perf_counter() - wall_time, time.thread_time() - cpu_time
+    memory_peak = max(0, tracemalloc.get_traced_memory()[1] - memory)
+    visits = sum(visitor.visits for visitor in visitors) - visits
+
+    ctx.stats.append(
+        AnalyserStats(
+            name, ctx.modules[0].name, wall_time, cpu_time, memory_peak, visits
+        )
+    )
+    ctx.completed.update(analyser.provides)
+
+
+def run_pipeline(
+    ctx: AnalysisContext,
+    factory: PIPE_FACTORY,
+    instrument: bool = False,
+) -> AnalysisContext:
     """
     Run each factory analyser on modules in the given context.
     The first module is the one with what analysis starts.
     (TODO: check that it's still true) It is an entrypoint.
+
+    Analysers are ordered by their dependencies (see `schedule`), the ones
+    whose results are already completed in the `ctx` are not run again.
+    Consecutive `fusable` analysers are run in one walk (see `FusedAnalyser`).
+
+    Analysers are run one by one, to analyse several files
+    at once see `main.analyse_files_in_parallel`.
+
+    If `instrument` is true, `AnalyserStats` of each analyser are added to
+    the `ctx.stats`. Memory is traced with `tracemalloc`, so everything
+    is noticeably slower. Before python 3.9 the peak can't be reset,
+    so it's the peak since the start of the tracing.
     """
 
-    for analyser in factory():
-        analyser.analyse(ctx)
+    pipeline = factory()
+
+    tracing = tracemalloc.is_tracing()
+    if instrument and not tracing:
+        tracemalloc.start()
+
+    try:
+        for analyser in fuse_analysers(schedule(ctx, pipeline)):
+            run_analyser(ctx, analyser, instrument)
+    finally:
+        if instrument and not tracing:
+            tracemalloc.stop()
 
     return ctx
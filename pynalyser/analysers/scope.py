@@ -6,17 +6,19 @@ from .tools import collect_names
 
 
 class ScopeAnalyser(DefinitionAnalyser):
+    provides = ("scopes",)
+
     def setup_symbols_by_assign(self, *targets: ast.AST) -> None:
         names = []
         for sub_node in targets:
             names.extend(collect_names(sub_node))
 
         for name in names:
-            symbol_data = self.symtab[name]
+            symbol = self.symtab.current_symbol(name)
 
             # in the other case it's already defined
-            symbol_data.change_scope(ScopeType.LOCAL)
-            symbol_data.imported = False
+            symbol.change_scope(ScopeType.LOCAL)
+            symbol.imported = False
 
     def visit_For(self, node: acr.For) -> None:
         self.setup_symbols_by_assign(node.target)
@@ -34,8 +36,7 @@ class ScopeAnalyser(DefinitionAnalyser):
     def setup_symbols_by_import(self, targets: List[ast.alias]) -> None:
         for alias in targets:
             name = alias.asname or alias.name  # those are never == ""
-            symbol_data = self.symtab[name]
-            symbol_data.imported = True
+            self.symtab.current_symbol(name).imported = True
 
     def visit_Import(self, node: ast.Import) -> None:
         self.setup_symbols_by_import(node.names)
@@ -45,24 +46,24 @@ class ScopeAnalyser(DefinitionAnalyser):
 
     def visit_Global(self, node: ast.Global) -> None:
         for name in node.names:
-            symbol_data = self.symtab[name]
+            symbol = self.symtab.current_symbol(name)
             # generally imports before global should not be allowed,
             # but cpython allows it https://tiny.one/global-in-docs
-            symbol_data.change_scope(ScopeType.GLOBAL)
+            symbol.change_scope(ScopeType.GLOBAL)
 
     def visit_Nonlocal(self, node: ast.Nonlocal) -> None:
         for name in node.names:
-            symbol_data = self.symtab[name]
+            symbol = self.symtab.current_symbol(name)
             # generally imports before nonlocal should not be allowed,
             # but cpython allows it https://tiny.one/nonlocal-in-docs
-            symbol_data.change_scope(ScopeType.NONLOCAL)
+            symbol.change_scope(ScopeType.NONLOCAL)
 
     def visit_NamedExpr(self, node: ast.NamedExpr) -> None:
         names = collect_names(node.target)
         assert len(names) == 1
         name, = names
 
-        symbol = self.symtab[name]
+        symbol = self.symtab.current_symbol(name)
         if isinstance(self.scope, acr.Comprehension):
             # in the other case it's already defined
             if not symbol.change_scope(ScopeType.NONLOCAL, fail=False):
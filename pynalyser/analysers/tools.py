@@ -1,26 +1,190 @@
-from typing import Any, Dict, List, Tuple
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import attr
 
 from .. import acr, ast
+from ..acr.utils import OTHER, SCOPE, node_kinds
+
+
+@attr.s(auto_attribs=True)
+class AnalyserStats:
+    """Measurements of one run of the analyser, see `run_pipeline(instrument=True)`"""
+
+    analyser: str
+    module: str  # name of the entrypoint module
+    wall_time: float  # seconds
+    cpu_time: float  # seconds, of the thread that ran the analyser
+    memory_peak: int  # bytes allocated at the peak (by tracemalloc)
+    # nodes visited by the analyser (`NodeVisitor.visits`),
+    # for the `FusedAnalyser` it's the sum of the fused analysers
+    visits: int
 
 
 @attr.s(auto_attribs=True)
 class AnalysisContext:
     modules: List[acr.Module]
     results: Dict[str, Any] = attr.ib(init=False, factory=dict)
+    # what completed analysers have provided, see Analyser.provides
+    completed: Set[str] = attr.ib(init=False, factory=set)
+    # filled by the instrumented runs of the pipeline
+    stats: List[AnalyserStats] = attr.ib(init=False, factory=list)
 
     def unpack(self) -> Tuple[List[acr.Module], Dict[str, Any]]:
         return self.modules, self.results
 
+    def merge(self, other: "AnalysisContext") -> None:
+        """Add modules and results of the `other` context to this one.
+        Results with the same key are merged using their `merge` method.
+        Only what is completed for both contexts stays completed.
+        Stats are concatenated."""
+
+        if self.modules:
+            self.completed &= other.completed
+        else:
+            self.completed = set(other.completed)
+
+        self.modules.extend(other.modules)
+        self.stats.extend(other.stats)
+
+        for key, value in other.results.items():
+            if key not in self.results:
+                self.results[key] = value
+            elif hasattr(self.results[key], "merge"):
+                self.results[key].merge(value)
+            else:
+                raise TypeError(
+                    f"Results for the key '{key}' cannot be merged, "
+                    f"'{type(self.results[key]).__name__}' has no 'merge' method"
+                )
+
 
 class Analyser(acr.NodeVisitor):
     context: AnalysisContext
 
-    def analyse(self, ctx: AnalysisContext) -> None:
+    # whether reanalyse() is supported, see analysers.incremental
+    incremental: bool = False
+
+    # whether the analyser can share the walk with others, see FusedAnalyser
+    fusable: bool = False
+
+    # names of what the analyser needs and produces (usually keys
+    # of the `AnalysisContext.results`), see `pipeline.schedule`,
+    # `requires = None` means that it depends on all of the previous analysers
+    requires: Optional[Tuple[str, ...]] = None
+    provides: Tuple[str, ...] = ()
+
+    def prepare(self, ctx: AnalysisContext) -> None:
+        """Everything that should be done before the walk"""
         self.context = ctx
+
+    def analyse(self, ctx: AnalysisContext) -> None:
+        self.prepare(ctx)
         self.start(ctx.modules[0])
 
+    def reanalyse(self, ctx: AnalysisContext, scope: acr.Scope, index: int) -> None:
+        """
+        Analyse only the `scope`, that is directly enclosed by the entrypoint
+        module and is the `index`-th definition of it's name there.
+        Results of the analysis of the rest of the module are expected
+        to be in the `ctx` already.
+        """
+
+        if not self.incremental:
+            raise NotImplementedError(
+                f"{type(self).__name__} does not support reanalysis"
+            )
+
+        self.context = ctx
+        self.scope = self.block = ctx.modules[0]
+        try:
+            self.visit(scope)
+        finally:
+            del self.scope, self.block
+
+
+class FusedAnalyser(Analyser):
+    """
+    Runs several analysers in one walk over the module,
+    every node is visited by each of the `analysers` in their order.
+
+    Analysers should be `fusable`, that means they only use `visit_*` methods
+    (the return values are ignored, `auto_generic_visit` is assumed)
+    and do all of their setup in `prepare`. Their results for the node are
+    seen by the next analysers, but not the results for the following nodes.
+    """
+
+    analysers: List[Analyser]
+
+    def __init__(self, analysers: List[Analyser]) -> None:
+        self.analysers = analysers
+        self.provides = tuple(
+            name for analyser in analysers for name in analyser.provides
+        )
+
+    def prepare(self, ctx: AnalysisContext) -> None:
+        super().prepare(ctx)
+        for analyser in self.analysers:
+            analyser.prepare(ctx)
+
+    def start(self, init_scope_block: acr.Scope) -> Any:
+        for analyser in self.analysers:
+            analyser.scope = analyser.block = init_scope_block
+        try:
+            return super().start(init_scope_block)
+        finally:
+            for analyser in self.analysers:
+                del analyser.scope, analyser.block
+
+    def visit(self, node: acr.NODE) -> Any:
+        for analyser in self.analysers:
+            analyser.visits += 1
+            try:
+                visitor = analyser._dispatch[type(node)]
+            except KeyError:
+                visitor = analyser.find_visitor(type(node))
+                analyser._dispatch[type(node)] = visitor
+
+            if visitor is not None:
+                visitor(analyser, node)
+            elif analyser.strict:
+                raise analyser.no_visitor_error(node)
+
+        return self.acr_generic_visit(node)
+
+    def acr_generic_visit(self, node: acr.NODE) -> Any:
+        kind = node_kinds(type(node))[0]
+        if kind == OTHER:
+            return self.generic_visit(node)
+
+        previous = [(analyser.scope, analyser.block) for analyser in self.analysers]
+        for analyser in self.analysers:
+            if kind == SCOPE:
+                analyser.scope = node  # type: ignore
+            analyser.block = node  # type: ignore
+
+        try:
+            return super().acr_generic_visit(node)
+        finally:
+            for analyser, (scope, block) in zip(self.analysers, previous):
+                analyser.scope, analyser.block = scope, block
+
+
+def fuse_analysers(analysers: List[Analyser]) -> List[Analyser]:
+    """Replace each run of the consecutive `fusable` analysers
+    with the `FusedAnalyser` that runs them"""
+
+    result: List[Analyser] = []
+
+    for fusable, group in groupby(analysers, key=lambda analyser: analyser.fusable):
+        run = list(group)
+        if fusable and len(run) > 1:
+            result.append(FusedAnalyser(run))
+        else:
+            result.extend(run)
+
+    return result
+
 
 class NameCollector(acr.NodeVisitor):
     # accounted for:
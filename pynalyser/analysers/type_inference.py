@@ -61,6 +61,12 @@ UNOP: Dict[type, str] = {
 
 class TypeInference(DefinitionAnalyser):
     auto_generic_visit: bool = False
+    # visitor methods visit the children themselves
+    iterative = False
+
+    # it also changes the cursors of the symbols, so it runs after the scopes
+    requires = ("SymTabAnalyser", "scopes")
+    provides = ("types",)
 
     # Inferable expressions
 
@@ -78,9 +84,20 @@ class TypeInference(DefinitionAnalyser):
         return SubscriptType(self.visit(node.value), self.visit(node.slice))
 
     def visit_BinOp(self, node: ast.BinOp) -> PynalyserType:
-        return BinOpType(
-            self.visit(node.left), BINOP[type(node.op)], self.visit(node.right)
-        )
+        # `a + b + c` is `(a + b) + c`, so the left operands are walked
+        # without the recursion, long sums would exceed the recursion limit
+        spine = [node]
+        while isinstance(spine[-1].left, ast.BinOp):
+            self.visits += 1
+            self.enter(spine[-1].left)
+            spine.append(spine[-1].left)
+
+        tp = self.visit(spine[-1].left)
+        for binop in reversed(spine):
+            tp = BinOpType(tp, BINOP[type(binop.op)], self.visit(binop.right))
+            if binop is not node:
+                self.leave(binop)
+        return tp
 
     def visit_Compare(self, node: ast.Compare) -> PynalyserType:
         return CompareOpType(
@@ -105,15 +122,15 @@ class TypeInference(DefinitionAnalyser):
     ### Basic "building blocks"  ###
 
     def visit_Slice(self, node: ast.Slice) -> PynalyserType:
-        return SliceType()
+        return SliceType.make()
 
     def visit_Constant(self, node: ast.Constant) -> PynalyserType:
         if isinstance(node.value, int):
-            return IntType()
-        return DataType(name=type(node.value).__name__, is_builtin=True)
+            return IntType.make()
+        return DataType.make(name=type(node.value).__name__, is_builtin=True)
 
     def visit_Name(self, node: ast.Name) -> PynalyserType:
-        return SymbolType(node.id, self.symtab[node.id].current_symbol)
+        return SymbolType(node.id, self.seen_definition(node))
 
     def infer_acr_expr(self, node: Union[ast.AST, acr.ACR]) -> PynalyserType:
         res = self.visit(node)
@@ -123,11 +140,11 @@ class TypeInference(DefinitionAnalyser):
 
     def infer_assignment(self, node: ast.AST, tp: PynalyserType) -> None:
         if isinstance(node, ast.Name):
-            symbol_data = self.symtab[node.id]
-            if symbol_data.type is UnknownType:
-                symbol_data.type = tp
+            symbol = self.symtab.current_symbol(node.id)
+            if symbol.type is UnknownType:
+                symbol.type = tp
             else:
-                symbol_data.type = UnionType(symbol_data.type, tp)
+                symbol.type = UnionType(symbol.type, tp)
                 # XXX: ideally we have to create
                 # new variables-clones for type changes
                 # anyways it's not handled here
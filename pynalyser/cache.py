@@ -0,0 +1,156 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from typing import List, Optional, Tuple
+
+import attr
+
+from . import __version__
+from .acr import Module
+
+SUFFIX = ".acr"
+
+
+@attr.s(auto_attribs=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    bytes_evicted: int = 0
+    size: int = 0  # bytes currently stored in the cache
+
+
+class ModuleCache:
+    """
+    Content-addressed on-disk cache of the translated modules.
+
+    The key is the hash of the source, python version and pynalyser version.
+    When the size of the cache exceeds `max_size` bytes, least recently
+    used entries are evicted until it's under `low_water * max_size`,
+    so the directory is not scanned on every write when the cache is full.
+    `max_size=None` means that the cache is not limited.
+    """
+
+    directory: str
+    max_size: Optional[int]
+    stats: CacheStats
+
+    low_water: float = 0.75
+
+    def __init__(self, directory: str, max_size: Optional[int] = 256 * 2**20):
+        self.directory = directory
+        self.max_size = max_size
+        self.stats = CacheStats()
+
+        os.makedirs(directory, exist_ok=True)
+        self.stats.size = sum(size for _, _, size in self._entries())
+
+    def key(self, source: str) -> str:
+        hasher = hashlib.sha256()
+        hasher.update(f"{sys.version}\0{__version__}\0".encode())
+        hasher.update(source.encode("utf-8", "surrogatepass"))
+        return hasher.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + SUFFIX)
+
+    def get(self, source: str, name: str = "<unknown>") -> Optional[Module]:
+        path = self.path(self.key(source))
+
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            module = pickle.loads(data)
+        except FileNotFoundError:
+            self.stats.misses += 1
+            return None
+        except Exception:
+            # corrupted or written by incompatible pickle, forget about it
+            self._remove(path)
+            self.stats.misses += 1
+            return None
+
+        # mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.stats.hits += 1
+        self.stats.bytes_read += len(data)
+
+        # the same source can be in the files with different names
+        module.name = name
+        return module
+
+    def put(self, source: str, module: Module) -> None:
+        path = self.path(self.key(source))
+        data = pickle.dumps(module, protocol=pickle.HIGHEST_PROTOCOL)
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        try:
+            replaced = os.stat(path).st_size
+        except OSError:
+            replaced = 0
+
+        # write to the temporary file first, so readers
+        # (possibly in other processes) never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            self._remove(temp_path)
+            raise
+
+        self.stats.bytes_written += len(data)
+        self.stats.size += len(data) - replaced
+
+        if self.max_size is not None and self.stats.size > self.max_size:
+            self.evict(int(self.max_size * self.low_water))
+
+    def evict(self, max_size: int) -> None:
+        """Remove least recently used entries until the size is under `max_size`"""
+
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        size = sum(size for _, _, size in entries)
+
+        for path, _, entry_size in entries:
+            if size <= max_size:
+                break
+            if self._remove(path):
+                size -= entry_size
+                self.stats.bytes_evicted += entry_size
+
+        self.stats.size = size
+
+    def clear(self) -> None:
+        self.evict(0)
+
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for file in files:
+                if not file.endswith(SUFFIX):
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -1,36 +1,139 @@
 import os
-from typing import Iterable, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional
 
 from . import ast
 from .acr import Module, translate_ast_to_acr
 from .analysers.pipeline import PIPE_FACTORY, default_pipe, run_pipeline
 from .analysers.tools import AnalysisContext
+from .cache import ModuleCache
 
 
-def parse_file(path: str) -> Module:
+def parse_file(path: str, cache: Optional[ModuleCache] = None) -> Module:
     with open(path, mode="r", encoding="utf-8") as file:
         return parse_string(
-            file.read(), os.path.splitext(os.path.basename(file.name))[0]
+            file.read(), os.path.splitext(os.path.basename(file.name))[0], cache
         )
 
 
-def parse_string(string: str, filename: str = "<unknown>") -> Module:
-    return parse_ast(ast.parse(string), filename)
+def parse_string(
+    string: str, filename: str = "<unknown>", cache: Optional[ModuleCache] = None
+) -> Module:
+
+    if cache is None:
+        return parse_ast(ast.parse(string), filename)
+
+    module = cache.get(string, filename)
+    if module is None:
+        module = parse_ast(ast.parse(string), filename)
+        cache.put(string, module)
+    return module
 
 
 def parse_ast(module: ast.Module, filename: str = "<unknown>") -> Module:
-    return translate_ast_to_acr(ast.normalize_ast_module(module), filename)
+    """
+    The ast is normalized during the translation. The `module` should have
+    locations (as after `ast.parse`), if it's not the case
+    use `ast.fix_missing_locations` before the call.
+    """
+
+    return translate_ast_to_acr(module, filename)
+
+
+def analyse_file(
+    path: str,
+    factory: PIPE_FACTORY = default_pipe,
+    cache: Optional[ModuleCache] = None,
+    instrument: bool = False,
+) -> AnalysisContext:
+    """Parse the file and run the pipeline with it as an entrypoint"""
+
+    return analyse_modules([parse_file(path, cache)], factory, instrument)
 
 
 def analyse_files(
-    paths: Iterable[str], factory: PIPE_FACTORY = default_pipe
+    paths: Iterable[str],
+    factory: PIPE_FACTORY = default_pipe,
+    jobs: int = 1,
+    cache: Optional[ModuleCache] = None,
+    instrument: bool = False,
+) -> AnalysisContext:
+    """
+    Every file is an entrypoint of it's own pipeline, contexts are merged
+    into one in the order of the `paths`. If `jobs` is greater than one,
+    the files are analysed in parallel, see `analyse_files_in_parallel`.
+    If `instrument` is true, `ctx.stats` have the stats of every file,
+    see `run_pipeline`.
+    """
+
+    if jobs > 1:
+        return analyse_files_in_parallel(paths, factory, jobs, cache, instrument)
+
+    ctx = AnalysisContext([])
+    for path in paths:
+        ctx.merge(analyse_file(path, factory, cache, instrument))
+    return ctx
+
+
+def analyse_iter(
+    paths: Iterable[str],
+    factory: PIPE_FACTORY = default_pipe,
+    cache: Optional[ModuleCache] = None,
+    instrument: bool = False,
+) -> Iterator[AnalysisContext]:
+    """
+    Lazily analyse files one by one, every file is an entrypoint of it's
+    own pipeline. Nothing is kept between the iterations, so the module
+    can be garbage-collected as soon as it's context is dropped.
+    """
+
+    for path in paths:
+        yield analyse_file(path, factory, cache, instrument)
+
+
+def analyse_files_in_parallel(
+    paths: Iterable[str],
+    factory: PIPE_FACTORY = default_pipe,
+    jobs: Optional[int] = None,
+    cache: Optional[ModuleCache] = None,
+    instrument: bool = False,
 ) -> AnalysisContext:
+    """
+    Parse and analyse each file in a separate process, every file is
+    an entrypoint of it's own pipeline. Contexts are merged into one
+    in the order of the `paths`, regardless of the order of completion.
+
+    `factory` should be picklable (e.g. module-level function).
+    `jobs` is the number of the processes, `None` means `os.cpu_count()`.
+    Each process works with it's own copy of the `cache`,
+    so `cache.stats` are not updated. Stats of the `instrument`ed
+    runs are sent back with the contexts.
+    """
+
+    ctx = AnalysisContext([])
+    paths = list(paths)
+
+    jobs = jobs or os.cpu_count() or 1
+    # several files per task, so the processes don't wait on each other
+    chunksize = max(1, len(paths) // (jobs * 4))
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        factories = [factory] * len(paths)
+        caches = [cache] * len(paths)
+        instruments = [instrument] * len(paths)
+        results = executor.map(
+            analyse_file, paths, factories, caches, instruments, chunksize=chunksize
+        )
+        for result in results:
+            ctx.merge(result)
 
-    return analyse_modules([parse_file(p) for p in paths], factory)
+    return ctx
 
 
 def analyse_modules(
-    modules: List[Module], factory: PIPE_FACTORY = default_pipe
+    modules: List[Module],
+    factory: PIPE_FACTORY = default_pipe,
+    instrument: bool = False,
 ) -> AnalysisContext:
 
-    return run_pipeline(AnalysisContext(modules), factory)
+    return run_pipeline(AnalysisContext(modules), factory, instrument=instrument)
@@ -1,9 +1,9 @@
 from enum import Flag, auto
-from typing import Any, List
+from typing import Any, List, Optional
 
 import attr
 
-from .types import PynalyserType, UnknownType
+from .types import Generation, PynalyserType, UnknownType
 
 
 # XXX: maybe ScopeKind?
@@ -17,8 +17,17 @@ class ScopeType(Flag):
     UNKNOWN = GLOBAL | NONLOCAL | LOCAL
 
 
+# generation of the symbols that are not in any symbol table
+_standalone = Generation()
+
+
+def _type_changed(symbol: "Symbol", attribute: Any, value: PynalyserType) -> Any:
+    symbol.generation.value += 1
+    return value
+
+
 # TODO: rename to Symbol and look at variables that use this class
-@attr.s(auto_attribs=True)
+@attr.s(auto_attribs=True, slots=True)
 class Symbol:
     # it seems like symbol's scope doesn't change
     # throughout the scope execution
@@ -28,7 +37,10 @@ class Symbol:
     is_arg: bool = False
     holds_symbol_table: bool = False
 
-    type: PynalyserType = UnknownType
+    # the memoised derefs that have seen it are dropped, when it's changed
+    type: PynalyserType = attr.ib(default=UnknownType, on_setattr=_type_changed)
+    # shared by the symbols of the same table, see `memoised_deref`
+    generation: Generation = attr.ib(default=_standalone, eq=False, repr=False)
 
     # if we change from UNKNOWN to more specific it's fine
     # but if we change from specific to other specific than
@@ -56,31 +68,110 @@ class Symbol:
 UNDEF = -1
 
 
-class MultiDefSymbol:
-    _symbols: List[Symbol]
-    _i: int
+class SymbolSlots:
+    """
+    Definitions of the symbols of one symbol table. Every symbol gets
+    a dense slot number (like fast locals in CPython), all of it's data
+    is in the parallel arrays at that index.
+    """
+
+    __slots__ = ("definitions", "cursors", "epochs", "epoch", "generation")
+
+    definitions: List[List[Symbol]]
+    # the types of the symbols have changed, when it's incremented
+    generation: Generation
+
+    # index of the current definition, it's valid only while the epoch
+    # of the slot is the same as the `epoch`, so all of the symbols
+    # can be reset at once by incrementing it
+    cursors: List[int]
+    epochs: List[int]
+    epoch: int
 
     def __init__(self) -> None:
-        self._symbols = []
-        self.reset()
+        self.definitions = []
+        self.cursors = []
+        self.epochs = []
+        self.epoch = 0
+        self.generation = Generation()
+
+    def add(self) -> int:
+        """Allocate the slot for the new symbol"""
+
+        self.definitions.append([])
+        self.cursors.append(UNDEF)
+        self.epochs.append(self.epoch)
+        return len(self.definitions) - 1
+
+
+class MultiDefSymbol:
+    """View of the symbol in the `SymbolSlots` of it's table,
+    a standalone symbol gets the slots of it's own"""
+
+    __slots__ = ("_slots", "_slot")
+
+    _slots: SymbolSlots
+    _slot: int
+
+    def __init__(self, slots: Optional[SymbolSlots] = None) -> None:
+        if slots is None:
+            slots = SymbolSlots()
+        self._slots = slots
+        self._slot = slots.add()
+
+    @property
+    def _symbols(self) -> List[Symbol]:
+        return self._slots.definitions[self._slot]
+
+    def _index(self) -> int:
+        slots, slot = self._slots, self._slot
+        if slots.epochs[slot] != slots.epoch:
+            return UNDEF
+        return slots.cursors[slot]
+
+    def _set_index(self, index: int) -> None:
+        slots, slot = self._slots, self._slot
+        slots.cursors[slot] = index
+        slots.epochs[slot] = slots.epoch
 
     @property
     def current_symbol(self) -> Symbol:
-        if not self.is_currently_defined:
+        """The current definition, it's better to get it once and use
+        it directly, than to access it's attributes through this class"""
+
+        slots, slot = self._slots, self._slot
+        index = slots.cursors[slot]
+        if index == UNDEF or slots.epochs[slot] != slots.epoch:
             raise Exception("You need to first do next_def on MultiDefSymbol")
-        return self._symbols[self._i]
+        return slots.definitions[slot][index]
+
+    def next_def(self) -> Symbol:
+        """Make the next definition current and return it"""
+
+        index = self._index() + 1
+        self._set_index(index)
+        symbols = self._symbols
+        if len(symbols) == index:
+            symbols.append(Symbol(generation=self._slots.generation))
+        return symbols[index]
+
+    def reset(self) -> None:
+        self._set_index(UNDEF)
 
-    def next_def(self) -> None:
-        self._i += 1
-        if len(self._symbols) == self._i:
-            self._symbols.append(Symbol())
+    def rewind(self, index: int) -> None:
+        """Make the definition at the `index` current after the next `next_def`"""
 
-    def reset(self):
-        self._i = UNDEF
+        self._set_index(index - 1)
+
+    def merge(self, other: "MultiDefSymbol") -> None:
+        """Add definitions of the `other` after the definitions of this symbol"""
+
+        self._symbols.extend(other._symbols)
+        self.reset()
 
     @property
     def is_currently_defined(self) -> bool:
-        return self._i != UNDEF
+        return self._index() != UNDEF
 
     scope: ScopeType
 
@@ -93,6 +184,8 @@ class MultiDefSymbol:
     def change_scope(self, new_scope: ScopeType, fail: bool = True) -> bool:
         return self.current_symbol.change_scope(new_scope, fail)
 
+    # attributes of the current definition, for compatibility,
+    # see `current_symbol` and `SymbolTableType.current_symbol`
     _names = "scope", "imported", "is_arg", "holds_symbol_table", "type"
 
     def __getattr__(self, name: str) -> Any:
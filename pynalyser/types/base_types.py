@@ -1,14 +1,128 @@
-from typing import Any, Callable, List, Optional, Set, Tuple, Union
+import functools
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 import attr
 from typing_extensions import Literal
 
-from .inheritance import Inheritable
+from .inheritance import Inheritable, is_subclass
 from .op import OpCarrier
 
 
+class Generation:
+    """
+    Counter of the changes of the types of some symbols (usually of one
+    symbol table, see `SymbolSlots`), it's incremented on every change.
+    The memoised derefs (see `memoised_deref`) are reused only while
+    the generations they have seen stay the same.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def __repr__(self) -> str:
+        return f"Generation({self.value})"
+
+
+# changes that can affect any deref, e.g. of the operations or of the fields
+_changes = Generation()
+
+# generations seen by the derefs that are being computed, the innermost last,
+# id(generation) -> (generation, it's value)
+_seen: List[Dict[int, Tuple[Generation, int]]] = []
+
+
+def invalidate_derefs() -> None:
+    """Drop all of the memoised results of `deref` (see `memoised_deref`)"""
+
+    _changes.value += 1
+
+
+def depend_on(generation: Generation) -> None:
+    """The result of the `deref` that is being computed
+    is valid only until the `generation` is changed"""
+
+    if _seen:
+        _seen[-1][id(generation)] = generation, generation.value
+
+
+DEREF = TypeVar("DEREF", bound=Callable[[Any, bool], "DataType"])
+
+
+def memoised_deref(deref: DEREF) -> DEREF:
+    """
+    The result is reused until any of the generations it has seen
+    (see `depend_on`) or any field of any type is changed.
+    A result without the reports could hide the errors,
+    so it's not reused for the calls with `report=True`.
+    """
+
+    @functools.wraps(deref)
+    def wrapper(self: PynalyserType, report: bool) -> "DataType":
+        memo = self._deref_memo
+        if memo is not None and memo[0] == _changes.value and (memo[2] or not report):
+            for generation, seen_value in memo[1]:
+                if generation.value != seen_value:
+                    break
+            else:
+                if _seen:
+                    # the enclosing deref depends on the same symbols
+                    seen = _seen[-1]
+                    for pair in memo[1]:
+                        seen[id(pair[0])] = pair
+                return memo[3]
+
+        changes = _changes.value
+        seen = {}
+        _seen.append(seen)
+        try:
+            value = deref(self, report)
+        finally:
+            _seen.pop()
+
+        if _seen:
+            _seen[-1].update(seen)
+        # bypasses `PynalyserType.__setattr__`, it's not a field
+        self.__dict__["_deref_memo"] = changes, tuple(seen.values()), report, value
+        return value
+
+    return wrapper  # type: ignore[return-value]
+
+
 # @attr.s(auto_attribs=True)
 class PynalyserType:
+    # (`_changes`, seen generations with their values, report, result)
+    # of the last `deref`, if it's memoised
+    _deref_memo: Optional[
+        Tuple[int, Tuple[Tuple[Generation, int], ...], bool, "DataType"]
+    ] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # generations of the other processes mean nothing
+        state = self.__dict__.copy()
+        state.pop("_deref_memo", None)
+        return state
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # the types that refer to this one can't see the change of it's field,
+        # so all of the memoised derefs are dropped
+        if name in self.__dict__:
+            invalidate_derefs()
+        object.__setattr__(self, name, value)
+
     @property
     def as_str(self) -> str:
         raise NotImplementedError(
@@ -23,17 +137,28 @@ class PynalyserType:
 
 @attr.s(auto_attribs=True, hash=True, init=False)
 class UnionType(PynalyserType):
+    """
+    Members are flattened, deduplicated (by identity) and ordered
+    on the creation. If there are more than `max_width` data types
+    among them, they are replaced with their common supertype,
+    the references (e.g. `SymbolType`) are kept, since they are not
+    resolved yet. `AnyType` absorbs the rest.
+    """
+
     types: Tuple[PynalyserType, ...]
 
+    max_width: ClassVar[int] = 16
+
     def __init__(self, *types: PynalyserType):
-        # for fancy formatting
-        # types = tuple(sorted(types, key=lambda x: str(x)))
-        self.__attrs_init__(types)  # type: ignore[attr-defined]
+        self.__attrs_init__(  # type: ignore[attr-defined]
+            union_members(types, self.max_width)
+        )
 
     @property
     def as_str(self) -> str:
         return f"Union[{', '.join(tp.as_str for tp in self.types)}]"
 
+    @memoised_deref
     def deref(self, report: bool) -> "DataType":
         types: Set[DataType] = {type.deref(report) for type in self.types}
 
@@ -46,17 +171,157 @@ class UnionType(PynalyserType):
         return UnknownType
 
 
+def _member_order(tp: PynalyserType) -> Tuple[int, str]:
+    # data types by name, the rest keep the order they were added in
+    if isinstance(tp, DataType):
+        return (0, tp.name)
+    return (1, "")
+
+
+def union_members(
+    types: Tuple[PynalyserType, ...], max_width: int
+) -> Tuple[PynalyserType, ...]:
+    members: Dict[int, PynalyserType] = {}
+
+    for tp in types:
+        # members of the union are already flat
+        for member in tp.types if isinstance(tp, UnionType) else (tp,):
+            if member is AnyType:
+                return (AnyType,)
+            members.setdefault(id(member), member)
+
+    if len(members) > max_width:
+        data_types: List[PynalyserType] = [
+            tp for tp in members.values() if isinstance(tp, DataType)
+        ]
+        if len(data_types) > max_width:
+            supertype = common_supertype(data_types)
+            if supertype is AnyType:
+                return (AnyType,)
+            for tp in data_types:
+                del members[id(tp)]
+            members[id(supertype)] = supertype
+
+    return tuple(sorted(members.values(), key=_member_order))
+
+
+def common_supertype(types: List[PynalyserType]) -> "DataType":
+    """
+    The nearest common base of the data types if it could be made
+    without fields (see `DataType.make`), otherwise `AnyType`
+    """
+
+    data_types = [tp for tp in types if isinstance(tp, DataType)]
+    if data_types and len(data_types) == len(types):
+        first, *rest = data_types
+        for base in first.mro:
+            if all(is_subclass(tp, base) for tp in rest):
+                try:
+                    return base.make()  # type: ignore[attr-defined,no-any-return]
+                except TypeError:
+                    break
+    return AnyType
+
+
 NotImplementedLiteral = Literal[NotImplemented]  # type: ignore
 Return = Union["DataType", NotImplementedLiteral]
 
 
-@attr.s(auto_attribs=True, hash=True, cmp=False)
+DT = TypeVar("DT", bound="DataType")
+
+# (type, (field, value or id of the type)...) -> interned instance
+# it's not a WeakValueDictionary on purpose: the interned types are keyed by
+# their ids here and in the `op.resolved_results`, so they must not be freed
+# (and their ids reused). It's bounded by the number of the structurally
+# different types, which are mostly the builtins and the containers of them.
+_interned: Dict[Tuple[Any, ...], Any] = {}
+
+
+# name -> the type that is compared by identity (e.g. `AnyType`) and back,
+# they are never freed, so the ids are not reused
+_singletons: Dict[str, "DataType"] = {}
+_singleton_names: Dict[int, str] = {}
+
+
+def singleton(name: str, tp: DT) -> DT:
+    """Register the `tp`, so it's pickled by the `name` and the copies
+    made by the other processes are the same object"""
+
+    _singletons[name] = tp
+    _singleton_names[id(tp)] = name
+    return tp
+
+
+def _get_singleton(name: str) -> "DataType":
+    return _singletons[name]
+
+
+def _make_interned(cls: Type[DT], fields: Dict[str, Any]) -> DT:
+    return cls.make(**fields)
+
+
+def _intern_key(cls: type, fields: Any) -> Tuple[Any, ...]:
+    # the nested types are compared by identity, `__eq__` simulates an operation
+    return (cls,) + tuple(
+        (name, id(value) if isinstance(value, PynalyserType) else value)
+        for name, value in fields
+    )
+
+
+@attr.s(auto_attribs=True, cmp=False)
 class DataType(PynalyserType, OpCarrier, Inheritable):
+    """
+    Structurally equal types can be shared with `make`, such (interned)
+    types are hashed by identity and are unpickled through `make`,
+    so the copies are the same objects. Others are hashed by their fields.
+    Types are not supposed to be changed after the creation, such a change
+    drops all of the memoised derefs.
+    """
+
     name: str = attr.ib(kw_only=True)
     is_builtin: bool = attr.ib(kw_only=True)
     # XXX: why do we need is_completed?
     is_completed: bool = attr.ib(default=False, kw_only=True)
 
+    is_interned: ClassVar[bool] = False
+
+    @classmethod
+    def make(cls: Type[DT], **fields: Any) -> DT:
+        """
+        The interned instance, it's created on the first call with
+        such fields. The nested types should be interned as well,
+        otherwise the result is shared only with the same nested objects.
+        """
+
+        key = _intern_key(cls, sorted(fields.items()))
+        tp = _interned.get(key)
+        if tp is None:
+            new = cls(**fields)
+            canonical = _intern_key(
+                cls, ((f.name, getattr(new, f.name)) for f in attr.fields(cls))
+            )
+            tp = _interned.setdefault(canonical, new)
+            tp.is_interned = True
+            _interned[key] = tp
+        return tp
+
+    def __hash__(self) -> int:
+        if self.is_interned:
+            return object.__hash__(self)
+        return hash(
+            (type(self), *(getattr(self, f.name) for f in attr.fields(type(self))))
+        )
+
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        # the copies would break the checks by identity
+        name = _singleton_names.get(id(self))
+        if name is not None:
+            return _get_singleton, (name,)
+        if self.is_interned:
+            fields = {f.name: getattr(self, f.name) for f in attr.fields(type(self))}
+            return _make_interned, (type(self), fields)
+        return super().__reduce_ex__(protocol)
+
     def deref(self, report: bool) -> "DataType":
         return self
 
@@ -200,6 +465,6 @@ class DataType(PynalyserType, OpCarrier, Inheritable):
     #     return self._get_op_func("__contains__")(self, value)
 
 
-AnyType = DataType(name="object", is_builtin=False)
-UnknownType = DataType(name="object", is_builtin=False)
+AnyType = singleton("AnyType", DataType(name="object", is_builtin=False))
+UnknownType = singleton("UnknownType", DataType(name="object", is_builtin=False))
 # invariant, cool name huh ;)
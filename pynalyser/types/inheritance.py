@@ -1,6 +1,10 @@
-from typing import List, Optional, Tuple, Type, Union
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional, Tuple, Type, Union, cast
+from weakref import WeakSet
 
 from .exceptions import duplicate_base, inheritance_cycle, invalid_mro
+from .op import clear_resolved
 
 
 ENTRY = Type["Inheritable"]
@@ -8,40 +12,54 @@ TYPE_OR_INSTANCE = Union["Inheritable", ENTRY]
 INHERITABLES = Tuple[ENTRY, ...]
 
 
-def find_a_good_head(linearizations: List[List[ENTRY]]) -> Optional[ENTRY]:
-    for head, *_ in linearizations:
-        if all(head not in tail for _, *tail in linearizations):
-            return head
-    return None
-
-
-def linearization(obj: ENTRY, parents: INHERITABLES) -> INHERITABLES:
-    parent_linearizations = [list(parent.mro) for parent in parents] + [list(parents)]
-    linearization: List[ENTRY] = []
-
-    # probably will take at most set(chain(*parent_linearizations)) iterations
-    while 1:
-        parent_linearizations = [lin for lin in parent_linearizations if lin]
-        if len(parent_linearizations) == 0:
-            return (obj, *linearization)
-
-        head = find_a_good_head(parent_linearizations)
-        if head is None:
-            raise invalid_mro([lin.__name__ for lin in parents])
+def linearization(
+    obj: ENTRY, parents: INHERITABLES, mros: Optional[Dict[ENTRY, INHERITABLES]] = None
+) -> INHERITABLES:
+    """
+    C3 linearization, the mros of the parents are already computed
+    (`set_bases` stores them or they are in the `mros`), so they are only merged here
+    """
+
+    # `parent.mro` is `type.mro` for mypy
+    mros = mros or {}
+    sequences = [
+        deque(mros.get(parent) or cast(INHERITABLES, parent.mro)) for parent in parents
+    ]
+    sequences.append(deque(parents))
+    sequences = [sequence for sequence in sequences if sequence]
+
+    # how many times the class is in the tails of the sequences,
+    # it can be the next head only if it's not in any of them
+    in_tails: Dict[ENTRY, int] = {}
+    for sequence in sequences:
+        for entry in islice(sequence, 1, None):
+            in_tails[entry] = in_tails.get(entry, 0) + 1
+
+    linearization: List[ENTRY] = [obj]
+    while sequences:
+        for sequence in sequences:
+            head = sequence[0]
+            if not in_tails.get(head):
+                break
+        else:
+            raise invalid_mro([parent.__name__ for parent in parents])
 
         linearization.append(head)
-        for parent_linearization in parent_linearizations:
-            if parent_linearization[0] == head:
-                del parent_linearization[0]
+        for sequence in sequences:
+            if sequence[0] is head:
+                sequence.popleft()
+                if sequence:
+                    in_tails[sequence[0]] -= 1
+        sequences = [sequence for sequence in sequences if sequence]
 
-    assert False, "Unreachable"
+    return tuple(linearization)
 
 
 def validate_bases(obj: ENTRY, bases: INHERITABLES) -> None:
     visited = set()
 
     for base in bases:
-        if base is obj:
+        if base is obj or is_subclass(base, obj):
             raise inheritance_cycle()
 
         if base not in visited:
@@ -50,10 +68,59 @@ def validate_bases(obj: ENTRY, bases: INHERITABLES) -> None:
             raise duplicate_base(base.__name__)
 
 
+def subclasses_in_order(obj: ENTRY) -> List[ENTRY]:
+    """Direct and indirect subclasses of the `obj`,
+    each one is after all of it's bases"""
+
+    # reversed postorder of the depth-first search
+    order: List[ENTRY] = []
+    visited = {obj}
+    stack = [(obj, iter(list(obj._subclasses)))]
+    while stack:
+        cls, subclasses = stack[-1]
+        for subclass in subclasses:
+            if subclass not in visited:
+                visited.add(subclass)
+                stack.append((subclass, iter(list(subclass._subclasses))))
+                break
+        else:
+            stack.pop()
+            order.append(cls)
+
+    order.pop()  # the obj
+    order.reverse()
+    return order
+
+
 def set_bases(obj: ENTRY, bases: INHERITABLES) -> None:
+    """
+    Set the `bases` of the `obj` and update the mro of it and of all
+    of it's subclasses (the ones whose bases were set by this function)
+    """
+
     validate_bases(obj, bases)
+
+    # all of the mros are computed before any is changed,
+    # so nothing is changed if any of them is inconsistent
+    mros = {obj: linearization(obj, bases)}
+    if mros[obj] != obj.mro:
+        for cls in subclasses_in_order(obj):
+            if any(base in mros for base in cls.bases):
+                mro = linearization(cls, cls.bases, mros)
+                if mro != cls.mro:
+                    mros[cls] = mro
+
+    for base in obj.bases:
+        base._subclasses.discard(obj)
+    for base in bases:
+        base._subclasses.add(obj)
     obj.bases = bases
-    obj.mro = linearization(obj, obj.bases)
+
+    for cls, mro in mros.items():
+        # `cls.mro` would be `type.mro` for mypy
+        cls.mro = mro
+        cls._ancestors = ancestors_mask(mro)
+    clear_resolved()
 
 
 _internal_counter = 0
@@ -64,12 +131,24 @@ def register_inheritance(obj: ENTRY) -> None:
     _internal_counter += 1
 
     obj._type_id = _internal_counter
+    obj._subclasses = WeakSet()
+
+
+def ancestors_mask(classes: Tuple[TYPE_OR_INSTANCE, ...]) -> int:
+    mask = 0
+    for cls in classes:
+        mask |= 1 << cls._type_id
+    return mask
 
 
 class Inheritable:
     mro: INHERITABLES = ()
     bases: INHERITABLES = ()
     _type_id: int = 0
+    # bits of the `_type_id`s of the `mro`
+    _ancestors: int = 0
+    # classes that have this one in their `bases`
+    _subclasses: "WeakSet[ENTRY]"
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -85,9 +164,6 @@ def is_subclass(
     class_or_tuple: Union[TYPE_OR_INSTANCE, Tuple[TYPE_OR_INSTANCE, ...]],
 ) -> bool:
     if isinstance(class_or_tuple, tuple):
-        return any(is_subclass(cls, tp) for tp in class_or_tuple)
+        return (cls._ancestors & ancestors_mask(class_or_tuple)) != 0
 
-    for base in cls.mro:
-        if is_type(base, class_or_tuple):
-            return True
-    return False
+    return (cls._ancestors >> class_or_tuple._type_id) & 1 == 1
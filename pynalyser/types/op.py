@@ -1,4 +1,14 @@
-from typing import TYPE_CHECKING, Callable, Dict, NamedTuple, Optional, Set, Tuple, Type
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
 
 if TYPE_CHECKING:
     from .base_types import PynalyserType, DataType
@@ -72,6 +82,24 @@ DEFAULT_FUNCTIONS = {
 
 OpDict = Dict[str, Op]
 
+# operations to try and whether they are reflected
+Calls = List[Tuple[Optional[Op], bool]]
+
+# Resolution of the binary and compare operations (their names don't overlap),
+# it's cleared when the operations or the bases of any type are changed.
+# (lhs._type_id, op, rhs._type_id) -> calls, they should not be modified
+resolved_calls: Dict[Tuple[int, str, int], Calls] = {}
+# (id(lhs), op, id(rhs)) -> result, only for the interned lhs and rhs
+resolved_results: Dict[Tuple[int, str, int], "DataType"] = {}
+
+
+def clear_resolved() -> None:
+    from .base_types import invalidate_derefs
+
+    resolved_calls.clear()
+    resolved_results.clear()
+    invalidate_derefs()
+
 
 class OpCarrier:
     ops: OpDict = {}
@@ -93,6 +121,7 @@ def set_op(cls: Type[OpCarrier], op: Op, name: Optional[str] = None) -> None:
     if name is None:
         name = op.function.__name__
     cls.ops[name] = op
+    clear_resolved()
 
 
 NORMAL = False
@@ -115,3 +144,4 @@ def set_default_ops(
 
     exclude = exclude or set()
     cls.ops.update(dict.fromkeys(DEFAULT_FUNCTIONS[name] - exclude, op))
+    clear_resolved()
@@ -4,11 +4,11 @@ import attr
 
 from .. import reports
 from .base_types import (AnyType, DataType, PynalyserType, UnionType,
-                         UnknownType)
+                         UnknownType, depend_on, memoised_deref)
 from .exceptions import (binary_not_supported, compare_not_supported,
                          not_iterable, not_subscriptable)
 from .inheritance import is_subclass, is_type
-from .op import Op, Signature
+from .op import Calls, Signature, resolved_calls, resolved_results
 from .structure_types import (BoolType, IntType, IterableType,
                               NotImplementedType)
 
@@ -16,15 +16,14 @@ if TYPE_CHECKING:
     from ..symbol import Symbol
 
 
-Calls = List[Tuple[Optional[Op], bool]]
-
-
 @attr.s(auto_attribs=True, auto_detect=True)
 class SymbolType(PynalyserType):
     name: str
     symbol: "Symbol"
 
+    @memoised_deref
     def deref(self, report: bool) -> DataType:
+        depend_on(self.symbol.generation)
         return self.symbol.type.deref(report)
 
     def __hash__(self) -> int:
@@ -66,6 +65,14 @@ class BinOpType(PynalyserType):
 
     @staticmethod
     def prepare_calls(lhs: DataType, op: str, rhs: DataType) -> Calls:
+        key = (lhs._type_id, op, rhs._type_id)
+        calls = resolved_calls.get(key)
+        if calls is None:
+            calls = resolved_calls[key] = BinOpType.resolve_calls(lhs, op, rhs)
+        return calls
+
+    @staticmethod
+    def resolve_calls(lhs: DataType, op: str, rhs: DataType) -> Calls:
         forward = f"__{op}__"
         reflected = f"__r{op}__"
 
@@ -87,6 +94,14 @@ class BinOpType(PynalyserType):
     def do_binary_op(
         cls, lhs: DataType, op: str, rhs: DataType, report: bool = True
     ) -> DataType:
+        # the result depends only on the types, if they are interned
+        interned = lhs.is_interned and rhs.is_interned
+        if interned:
+            key = (id(lhs), op, id(rhs))
+            cached = resolved_results.get(key)
+            if cached is not None:
+                return cached
+
         for method, reflected in cls.prepare_calls(lhs, op, rhs):
             if method is None:
                 continue
@@ -97,6 +112,8 @@ class BinOpType(PynalyserType):
                 value = method(lhs, rhs)
 
             if value is not NotImplementedType:
+                if interned:
+                    resolved_results[key] = value
                 return value
 
         if report:
@@ -116,6 +133,7 @@ class BinOpType(PynalyserType):
         if isinstance(self.rhs, SymbolType):
             self.rhs.symbol.type = rhs
 
+    @memoised_deref
     def deref(self, report: bool) -> DataType:
         return self.do_binary_op(
             self.lhs.deref(report), self.op, self.rhs.deref(report), report
@@ -134,6 +152,14 @@ class CompareOpType(PynalyserType):
 
     @staticmethod
     def prepare_calls(lhs: DataType, op: str, rhs: DataType) -> Calls:
+        key = (lhs._type_id, op, rhs._type_id)
+        calls = resolved_calls.get(key)
+        if calls is None:
+            calls = resolved_calls[key] = CompareOpType.resolve_calls(lhs, op, rhs)
+        return calls
+
+    @staticmethod
+    def resolve_calls(lhs: DataType, op: str, rhs: DataType) -> Calls:
         if op == "is":
             return []
 
@@ -161,7 +187,7 @@ class CompareOpType(PynalyserType):
         assert len(calls) == 0, f"calls were prepared for '{op}' operation"
 
         # lhs.id == rhs.id or something, idk
-        return BoolType()
+        return BoolType.make()
 
     @classmethod
     def do_contains(
@@ -188,6 +214,14 @@ class CompareOpType(PynalyserType):
         cls, lhs: DataType, op: str, rhs: DataType, report: bool = True
     ) -> DataType:
 
+        # the result depends only on the types, if they are interned
+        interned = lhs.is_interned and rhs.is_interned
+        if interned:
+            key = (id(lhs), op, id(rhs))
+            cached = resolved_results.get(key)
+            if cached is not None:
+                return cached
+
         for method, reflected in cls.prepare_calls(lhs, op, rhs):
             if method is None:
                 continue
@@ -198,6 +232,8 @@ class CompareOpType(PynalyserType):
                 value = method(lhs, rhs)
 
             if value is not NotImplementedType:
+                if interned:
+                    resolved_results[key] = value
                 return value
 
         # if neither object implements it,
@@ -258,6 +294,7 @@ class CompareOpType(PynalyserType):
         if isinstance(self.comparators[0], SymbolType):
             self.comparators[0].symbol.type = rhs
 
+    @memoised_deref
     def deref(self, report: bool) -> DataType:
         comparators = self.deref_comparators(report)
 
@@ -265,7 +302,7 @@ class CompareOpType(PynalyserType):
         for lhs, op, rhs in zip(comparators, self.ops, comparators[1:]):
             self.do_compare_op(lhs, op, rhs, report)
 
-        return BoolType()
+        return BoolType.make()
 
 
 @attr.s(auto_attribs=True, hash=True)
@@ -273,6 +310,7 @@ class SubscriptType(PynalyserType):
     value: PynalyserType
     slice: PynalyserType
 
+    @memoised_deref
     def deref(self, report: bool) -> DataType:
         value = self.value.deref(report)
         method = value.ops.get("__getitem__")
@@ -302,6 +340,7 @@ class ItemType(PynalyserType):
             #     self.iterable = IterableType(
             #         item_type=UnknownType, is_builtin=False)
 
+    @memoised_deref
     def deref(self, report: bool) -> DataType:
         return self.iterable.deref(report).item_type.deref(report)  # type: ignore
 
@@ -314,8 +353,8 @@ class CallType(PynalyserType):
 
     def deref(self, report: bool) -> DataType:
         if isinstance(self.func, SymbolType) and self.func.name == "range":
-            return IterableType(
-                item_type=IntType(), is_builtin=False
+            return IterableType.make(
+                item_type=IntType.make(), is_builtin=False
             )  # XXX: is_builtin??
 
         return AnyType
@@ -1,6 +1,6 @@
 import attr
 
-from .base_types import AnyType, PynalyserType, DataType
+from .base_types import AnyType, PynalyserType, DataType, singleton
 from .op import REVERSED, Op, Signature, set_default_ops, set_op
 from .inheritance import set_bases
 
@@ -13,10 +13,12 @@ from .inheritance import set_bases
 signature: Signature
 
 
-NotImplementedType = DataType(name="NotImplementedType", is_builtin=True)
+NotImplementedType = singleton(
+    "NotImplementedType", DataType(name="NotImplementedType", is_builtin=True)
+)
 
 
-@attr.s(auto_attribs=True, hash=True, cmp=False)
+@attr.s(auto_attribs=True, cmp=False)
 class IntType(DataType):
     name: str = "int"
     is_builtin: bool = True
@@ -26,28 +28,28 @@ class IntType(DataType):
 set_bases(IntType, ())
 
 
-signature = (IntType(),)
+signature = (IntType.make(),)
 
 
 # also see "long_compare" in cpython github
 @Op.sign(signature)
 def _int_cmp(this: DataType, value: PynalyserType) -> DataType:
     if isinstance(value, IntType):
-        return BoolType()
+        return BoolType.make()
     return NotImplementedType
 
 
 @Op.sign(signature)
 def _int_binop(this: DataType, value: PynalyserType) -> DataType:
     if isinstance(value, IntType):
-        return IntType()
+        return IntType.make()
     return NotImplementedType
 
 
 @Op.sign(signature)
 def _int__truediv__(this: DataType, value: PynalyserType) -> DataType:
     if isinstance(value, IntType):
-        return FloatType()
+        return FloatType.make()
     return NotImplementedType
 
 
@@ -58,7 +60,7 @@ def _int__truediv__(this: DataType, value: PynalyserType) -> DataType:
 #         if isinstance(mod, IntType) or mod is None:
 #             # FIXME: this is true only if 'value' is negative
 #             # otherwise it's int
-#             return FloatType()
+#             return FloatType.make()
 #     return NotImplementedType
 
 
@@ -68,7 +70,7 @@ set_default_ops(IntType, _int_binop, exclude={"__matmul__"})
 set_op(IntType, _int__truediv__, "__truediv__")
 
 
-@attr.s(auto_attribs=True, hash=True, cmp=False)
+@attr.s(auto_attribs=True, cmp=False)
 class BoolType(IntType):
     name: str = "bool"
     is_builtin: bool = True
@@ -78,7 +80,7 @@ class BoolType(IntType):
 set_bases(BoolType, (IntType,))
 
 
-@attr.s(auto_attribs=True, hash=True, cmp=False)
+@attr.s(auto_attribs=True, cmp=False)
 class FloatType(DataType):
     name: str = "float"
     is_builtin: bool = True
@@ -88,13 +90,13 @@ class FloatType(DataType):
 set_bases(FloatType, ())
 
 
-signature = (IntType(), FloatType())
+signature = (IntType.make(), FloatType.make())
 
 
 @Op.sign(signature)
 def _float_binop(this: DataType, value: PynalyserType) -> DataType:
     if isinstance(value, (IntType, FloatType)):
-        return FloatType()
+        return FloatType.make()
     return NotImplementedType
 
 
@@ -103,7 +105,7 @@ set_default_ops(FloatType, _float_binop, exclude={"__pow__", "__matmul__"})
 set_default_ops(FloatType, _float_binop, REVERSED, exclude={"__rpow__", "__rmatmul__"})
 
 
-@attr.s(auto_attribs=True, hash=True, cmp=False)
+@attr.s(auto_attribs=True, cmp=False)
 class SliceType(DataType):
     name: str = "slice"
     is_builtin: bool = True
@@ -113,7 +115,7 @@ class SliceType(DataType):
 set_bases(SliceType, ())
 
 
-@attr.s(auto_attribs=True, hash=True, cmp=False)
+@attr.s(auto_attribs=True, cmp=False)
 class IterableType(DataType):
     item_type: PynalyserType
     name: str = "Iterable"
@@ -126,7 +128,7 @@ class IterableType(DataType):
 set_bases(IterableType, ())
 
 
-@attr.s(auto_attribs=True, hash=True, cmp=False)  # auto_detect=True)
+@attr.s(auto_attribs=True, cmp=False)  # auto_detect=True)
 class SequenceType(IterableType):
     pass
 
@@ -138,7 +140,7 @@ set_bases(SequenceType, (IterableType,))
 # see docs.python.org/3/c-api/typeobj.html
 
 
-@Op.sign((IntType(),))
+@Op.sign((IntType.make(),))
 def _seq__mul__(this: DataType, value: PynalyserType) -> DataType:
     if isinstance(value, IntType):
         return this
@@ -156,7 +158,7 @@ set_op(SequenceType, _seq__mul__, "__rmul__")
 set_op(SequenceType, _seq__getitem__, "__getitem__")
 
 
-@attr.s(auto_attribs=True, hash=True, cmp=False)
+@attr.s(auto_attribs=True, cmp=False)
 class ListType(SequenceType):
     name: str = "list"
     is_builtin: bool = True
@@ -166,7 +168,7 @@ class ListType(SequenceType):
 set_bases(ListType, (SequenceType,))
 
 
-@Op.sign((IntType(), SliceType()))
+@Op.sign((IntType.make(), SliceType.make()))
 def _list__getitem__(this: ListType, item: PynalyserType) -> DataType:
     if isinstance(item, IntType):
         return this.item_type.deref(report=True)
@@ -179,7 +181,7 @@ ListType.ops = ListType.ops.copy()
 set_op(ListType, _list__getitem__, "__getitem__")
 
 
-@attr.s(auto_attribs=True, hash=True, cmp=False)
+@attr.s(auto_attribs=True, cmp=False)
 class TupleType(SequenceType):
     name: str = "tuple"
     is_builtin: bool = True
@@ -1,27 +1,73 @@
 # XXX: this is also structure type, maybe merge?
 
-from typing import TYPE_CHECKING, DefaultDict, Iterable, List, Optional
+import copyreg
+from typing import TYPE_CHECKING, Any, DefaultDict, Dict, Iterable, List, Optional
 
 import attr
 
 from .base_types import PynalyserType, DataType, UnknownType
 
 if TYPE_CHECKING:
-    from ..symbol import MultiDefSymbol, Symbol
+    from ..symbol import MultiDefSymbol, Symbol, SymbolSlots
 
 
 @attr.s(auto_attribs=True, hash=True, cmp=False)
 class SymbolTableType(DefaultDict[str, "MultiDefSymbol"], DataType):
     is_builtin: bool = attr.ib(default=True, init=False)
 
+    # the data of the symbols, the mapping holds only the views of it
+    symbol_slots: "SymbolSlots" = attr.ib(init=False, repr=False, hash=False)
+
+    @symbol_slots.default
+    def _symbol_slots_default(self) -> "SymbolSlots":
+        from ..symbol import SymbolSlots
+
+        return SymbolSlots()
+
     def __attrs_pre_init__(self):
         from ..symbol import MultiDefSymbol
 
         super().__init__(MultiDefSymbol)  # for defaultdict
 
+    def __missing__(self, name: str) -> "MultiDefSymbol":
+        from ..symbol import MultiDefSymbol
+
+        symbol = self[name] = MultiDefSymbol(self.symbol_slots)
+        return symbol
+
+    def current_symbol(self, name: str) -> "Symbol":
+        """The current definition of the symbol, same as `self[name].current_symbol`"""
+
+        return self[name].current_symbol
+
+    @property
+    def epoch(self) -> int:
+        return self.symbol_slots.epoch
+
     def reset(self) -> None:
-        for symbol in self.values():
-            symbol.reset()
+        """Reset all of the symbols, it takes constant time"""
+
+        self.symbol_slots.epoch += 1
+
+    def merge(self, other: "SymbolTableType") -> None:
+        """Add symbols of the `other`, symbols with the same name
+        will hold definitions of both tables"""
+
+        for name, symbol in other.items():
+            self[name].merge(symbol)
+
+    # defaultdict.__reduce__ passes default_factory to the __init__,
+    # but here __init__ is generated by attrs, so it won't accept it
+    def __reduce__(self) -> Any:
+        items = iter(self.items())
+        new = copyreg.__newobj__  # type: ignore[attr-defined]
+        return new, (type(self),), self.__dict__, None, items
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        from ..symbol import MultiDefSymbol
+
+        self.default_factory = MultiDefSymbol
+        self.__dict__.update(state)
 
 
 @attr.s(auto_attribs=True, hash=True, auto_detect=True)
@@ -0,0 +1,422 @@
+import pickle
+import sys
+from typing import Union
+
+import attr
+import pytest
+
+from pynalyser import acr
+from pynalyser.main import parse_ast, parse_string
+
+from utils import do_test
+
+
+CODE = """
+def f(a):
+    if a:
+        return [i for i in range(a)]
+    for i in range(a):
+        with open(i) as file:
+            pass
+    while a:
+        a -= 1
+class C:
+    pass
+"""
+
+
+class Collector(acr.NodeVisitor):
+    def __init__(self) -> None:
+        self.nodes: list = []
+
+    def visit(self, node: acr.NODE) -> None:
+        if isinstance(node, acr.ACR):
+            self.nodes.append(node)
+        super().visit(node)
+
+
+def collect(module: acr.Module) -> list:
+    collector = Collector()
+    collector.start(module)
+    return collector.nodes
+
+
+def test_slots():
+    module = parse_string(CODE)
+    nodes = collect(module)
+    assert {type(node).__name__ for node in nodes} >= {
+        "Module",
+        "FlowContainer",
+        "CodeBlock",
+        "Function",
+        "If",
+        "ListComp",
+        "For",
+        "With",
+        "While",
+        "Class",
+    }
+
+    for node in nodes:
+        if isinstance(node, acr.ast.AST):
+            continue  # AST always has the __dict__
+        assert not hasattr(node, "__dict__"), type(node)
+
+    for node in nodes:
+        assert "_fields" not in getattr(node, "__slots__", ())
+        assert "_attributes" not in getattr(node, "__slots__", ())
+
+
+def test_fields():
+    function = acr.Function("f", is_async=False, lineno=1, col_offset=0)
+    assert set(acr.Function._fields) == {
+        "name",
+        "body",
+        "enclosing",
+        "args",
+        "decorator_list",
+        "is_async",
+    }
+    assert function._fields is acr.Function._fields
+    assert set(acr.Function._fields) | set(acr.Function._attributes) == {
+        field.name
+        for field in attr.fields(acr.Function)
+        if not field.metadata.get("internal")
+    }
+    assert acr.Function._block_fields == ("body",)
+
+
+def test_fields_without_instances():
+    assert set(acr.While._fields) == {"body", "orelse", "test"}
+    assert "_fields" in acr.While.__dict__
+    assert acr.Lambda._fields is not acr.ast.expr._fields
+    assert acr.FlowContainer._fields == ()
+
+
+def test_fields_of_base_classes():
+    # reading the base class first should not hide the fields of the subclasses
+    assert acr.Scope._fields == ("name", "body", "enclosing")
+    assert acr.Block._fields == ()
+    assert "_fields" not in acr.Scope.__dict__
+    assert set(acr.Function._fields) >= {"args", "decorator_list", "is_async"}
+    assert set(acr.If._fields) == {"body", "orelse", "test"}
+
+
+def test_fused_normalization():
+    source = CODE + "x[1:2, 3]\nf(1, 's', b'x', None, ..., True)[a]\n"
+    normalized = acr.ast.normalize_ast_module(acr.ast.parse(source))
+    fused = parse_ast(acr.ast.parse(source))
+    separate = acr.translate_ast_to_acr(normalized, "<unknown>")
+    assert acr.dump(fused, include_attributes=True) == acr.dump(
+        separate, include_attributes=True
+    )
+
+
+class NameVisitor(acr.NodeVisitor):
+    def __init__(self) -> None:
+        self.names: list = []
+
+    def visit_Name(self, node: acr.ast.Name) -> None:
+        self.names.append(node.id)
+
+
+class UpperNameVisitor(NameVisitor):
+    def visit_Name(self, node: acr.ast.Name) -> None:
+        self.names.append(node.id.upper())
+
+
+def test_dispatch():
+    module = parse_string("a = b\nif c:\n    d(e)\n")
+
+    visitor = NameVisitor()
+    visitor.start(module)
+    assert visitor.names == ["a", "b", "d", "e"]  # If.test is not a block field
+    assert NameVisitor._dispatch[acr.ast.Name] is NameVisitor.visit_Name
+    assert acr.If in NameVisitor._dispatch
+    assert acr.NodeVisitor._dispatch == {}
+
+    # subclass should not reuse the table of the parent
+    visitor = UpperNameVisitor()
+    visitor.start(module)
+    assert visitor.names == ["A", "B", "D", "E"]
+    assert UpperNameVisitor._dispatch[acr.ast.Name] is UpperNameVisitor.visit_Name
+
+
+class IterativeNameVisitor(NameVisitor):
+    iterative = True
+
+
+class ScopeTracer(acr.NodeVisitor):
+    def __init__(self) -> None:
+        self.trace: list = []
+
+    def visit_Name(self, node: acr.ast.Name) -> None:
+        self.trace.append((node.id, self.scope.name, type(self.block).__name__))
+
+
+class IterativeScopeTracer(ScopeTracer):
+    iterative = True
+
+
+class Incrementer(acr.ACRCodeTransformer):
+    def visit_Constant(self, node: acr.ast.Constant) -> acr.ast.Constant:
+        assert isinstance(node.value, int)
+        return acr.ast.Constant(node.value + 1)
+
+    def visit_Pass(self, node: acr.ast.Pass) -> None:
+        return None
+
+
+class IterativeIncrementer(Incrementer):
+    iterative = True
+
+
+def deep_module(depth: int) -> acr.Module:
+    expr: Union[acr.ast.Constant, acr.ast.BinOp] = acr.ast.Constant(0)
+    for _ in range(depth):
+        expr = acr.ast.BinOp(expr, acr.ast.Add(), acr.ast.Name("x", acr.ast.Load()))
+    module = acr.Module("deep")
+    module.body.add_code(expr)
+    return module
+
+
+def test_iterative():
+    assert IterativeNameVisitor._can_iterate
+    assert not Collector._can_iterate  # overrides visit
+
+    recursive, iterative = ScopeTracer(), IterativeScopeTracer()
+    module = parse_string(CODE)
+    assert recursive.start(module) is iterative.start(module) is module
+    assert recursive.trace == iterative.trace
+    assert ("a", "f", "While") in iterative.trace
+
+    module, other = parse_string(CODE), parse_string(CODE)
+    Incrementer().start(module)
+    IterativeIncrementer().start(other)
+    assert acr.dump(module) == acr.dump(other)
+
+
+class HookTracer(acr.NodeVisitor):
+    def __init__(self) -> None:
+        self.trace: list = []
+
+    def enter(self, node: acr.NODE) -> None:
+        self.trace.append(("enter", type(node).__name__, self.scope.name))
+
+    def leave(self, node: acr.NODE) -> None:
+        self.trace.append(("leave", type(node).__name__, self.scope.name))
+
+
+class IterativeHookTracer(HookTracer):
+    iterative = True
+
+
+class HookIncrementer(Incrementer, HookTracer):
+    pass
+
+
+class IterativeHookIncrementer(HookIncrementer):
+    iterative = True
+
+
+def test_hooks():
+    for recursive, iterative in [
+        (HookTracer(), IterativeHookTracer()),
+        (HookIncrementer(), IterativeHookIncrementer()),
+    ]:
+        recursive.start(parse_string(CODE))
+        iterative.start(parse_string(CODE))
+        assert recursive.trace == iterative.trace
+        assert recursive.trace[0] == ("enter", "Module", "<unknown>")
+        assert ("leave", "While", "f") in recursive.trace
+        entered = [item[1] for item in recursive.trace if item[0] == "enter"]
+        left = [item[1] for item in recursive.trace if item[0] == "leave"]
+        assert sorted(entered) == sorted(left) and "Load" in entered
+
+    with pytest.raises(TypeError, match="can't be iterative"):
+
+        class IterativeCollector(Collector):
+            iterative = True
+
+
+def test_iterative_depth():
+    module = deep_module(sys.getrecursionlimit() * 2)
+
+    visitor = IterativeNameVisitor()
+    visitor.start(module)
+    assert len(visitor.names) == sys.getrecursionlimit() * 2
+
+    IterativeIncrementer().start(module)
+    block = module.body[0]
+    assert isinstance(block, acr.CodeBlock)
+    expr: acr.NODE = block[0]
+    while isinstance(expr, acr.ast.BinOp):
+        expr = expr.left
+    assert isinstance(expr, acr.ast.Constant) and expr.value == 1
+
+
+class NodeTracer(acr.NodeVisitor):
+    def __init__(self) -> None:
+        self.trace: list = []
+
+    def visit(self, node: acr.NODE) -> None:
+        self.trace.append((node, self.scope, self.block))
+        super().visit(node)
+
+
+def test_node_index():
+    module = parse_string(CODE)
+    assert module.node_index is None
+    assert "node_index" not in acr.Module._fields
+
+    index = acr.NodeIndex.of(module)
+    assert acr.NodeIndex.of(module) is index is module.node_index
+
+    tracer = NodeTracer()
+    tracer.start(module)
+    entries = sorted(entry for tp in index.types() for entry in index[tp])
+    assert [entry[1:] for entry in entries] == tracer.trace
+
+    functions = index[acr.Function]
+    assert [entry.node.name for entry in functions] == ["f"]
+    assert functions[0].scope is functions[0].block is module
+    assert [entry.node for entry in index.nodes(acr.For, acr.While)] == [
+        node for node, _, _ in tracer.trace if isinstance(node, (acr.For, acr.While))
+    ]
+
+
+def test_start_indexed():
+    module = parse_string(CODE)
+
+    full, indexed = ScopeTracer(), ScopeTracer()
+    full.start(module)
+    indexed.start_indexed(module)
+    assert indexed.trace == full.trace
+
+    with pytest.raises(TypeError):
+        Collector().start_indexed(module)
+
+
+class WithTracer(acr.NodeVisitor):
+    def __init__(self) -> None:
+        self.trace: list = []
+
+    def visit_With(self, node: acr.With) -> None:
+        self.trace.append((node, self.scope, self.block))
+
+    def visit_Call(self, node: acr.ast.Call) -> None:
+        self.trace.append((node, self.scope, self.block))
+
+    def visit_Name(self, node: acr.ast.Name) -> None:
+        self.trace.append((node, self.scope, self.block))
+
+
+class PrunedWithTracer(WithTracer):
+    handled_types = ("With", "Call")
+
+
+class IterativePrunedWithTracer(PrunedWithTracer):
+    iterative = True
+
+
+def test_pruned_visit():
+    module = parse_string(CODE)
+    assert not module.subtree_types  # `is None` would narrow it for the rest
+
+    full, pruned = WithTracer(), PrunedWithTracer()
+    full.start(module)
+    pruned.start(module)
+
+    mask = acr.utils.types_mask(["With", "Call", "ListComp"])
+    assert module.subtree_types is not None
+    assert module.subtree_types & mask == mask
+    block = module.body[0]
+    assert isinstance(block, acr.CodeBlock)
+    cls = block[-1]
+    assert isinstance(cls, acr.Class) and cls.subtree_types is not None
+    assert not cls.subtree_types & mask
+
+    # only the names in the subtrees with the calls and withs are visited
+    assert len(pruned.trace) < len(full.trace)
+    assert [
+        entry for entry in full.trace if not isinstance(entry[0], acr.ast.Name)
+    ] == [entry for entry in pruned.trace if not isinstance(entry[0], acr.ast.Name)]
+
+    iterative = IterativePrunedWithTracer()
+    iterative.start(module)
+    assert iterative.trace == pruned.trace
+
+
+class PassToCall(acr.ACRCodeTransformer):
+    def visit_Pass(self, node: acr.ast.Pass) -> acr.ast.Expr:
+        name = acr.ast.Name("print", acr.ast.Load())
+        return acr.ast.Expr(acr.ast.Call(name, [], []))
+
+
+class IterativePassToCall(PassToCall):
+    iterative = True
+
+
+def test_pruned_visit_after_transform():
+    for transformer in (PassToCall(), IterativePassToCall()):
+        module = parse_string("def f():\n    if a:\n        pass\n")
+        PrunedWithTracer().start(module)
+        assert module.subtree_types is not None
+
+        # the call is added where the masks had no calls
+        transformer.start(module)
+        pruned = PrunedWithTracer()
+        pruned.start(module)
+        assert [type(entry[0]) for entry in pruned.trace] == [
+            acr.ast.Call,
+            acr.ast.Name,
+        ]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8), reason="no end positions")
+def test_location_index():
+    module = parse_string(CODE)
+    index = acr.LocationIndex.of(module)
+    assert acr.LocationIndex.of(module) is index is module.location_index
+
+    block = module.body[0]
+    assert isinstance(block, acr.CodeBlock)
+    function = block[0]
+    assert isinstance(function, acr.Function)
+    assert (function.lineno, function.end_lineno) == (2, 9)
+
+    # "    if a:" and "        return [i for i in range(a)]"
+    name = index.at(3, 7)
+    assert name is not None and isinstance(name.node, acr.ast.Name)
+    assert name.node.id == "a"
+    test = index.at(3, 6)
+    assert test is not None and isinstance(test.node, acr.If)
+    assert test.node.test == name.node
+    listcomp = index.at(4, 23)
+    assert listcomp is not None and type(listcomp.node) is acr.ListComp
+    scope = index.scope_at(4, 23)
+    assert scope is not None and scope.name == "<listcomp>"
+    assert index.scope_at(3, 7) is function
+    scope = index.scope_at(11, 4)
+    assert scope is not None and scope.name == "C"
+    assert index.at(1, 0) is index.scope_at(1, 0) is None
+
+    spans = index.within((8, 0), (10, 0))
+    assert [type(span.node).__name__ for span in spans] == [
+        "While",
+        "Name",
+        "AugAssign",
+        "Name",
+        "Constant",
+    ]
+    first = index.within((8, 0), (9, 0))[0].node
+    assert isinstance(first, acr.ast.Name) and first.id == "a"
+
+
+def test_pickle():
+    module = parse_string(CODE)
+    assert acr.dump(pickle.loads(pickle.dumps(module))) == acr.dump(module)
+
+
+if __name__ == "__main__":
+    do_test(__file__)
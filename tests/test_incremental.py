@@ -0,0 +1,117 @@
+from pynalyser.analysers.definitions import module_symbol_table
+from pynalyser.analysers.incremental import (
+    IncrementalAnalysis,
+    ScopeCollector,
+    fingerprint,
+)
+from pynalyser.main import parse_string
+from pynalyser.types import (
+    FunctionType,
+    IntType,
+    ListType,
+    PynalyserType,
+    SymbolTableType,
+)
+
+from utils import do_test
+
+
+CODE = """
+a = 1
+def f(b):
+    c = 1
+    return c
+class C:
+    d = 1
+x = [i for i in range(10)]
+"""
+
+
+def local_type(symtab: SymbolTableType, scope: str, name: str) -> PynalyserType:
+    symbol = symtab[scope]
+    symbol.rewind(0)
+    symbol.next_def()
+    table = symbol.type
+    assert isinstance(table, SymbolTableType)
+    table.reset()
+    table[name].next_def()
+    return table[name].type.deref(report=False)
+
+
+def test_incremental_analysis():
+    analysis = IncrementalAnalysis()
+
+    ctx = analysis.update(parse_string(CODE, "mod"))
+    assert analysis.reanalysed is None
+    symtab = module_symbol_table(ctx)
+    f_table = symtab["f"].type
+    C_table = symtab["C"].type
+    assert isinstance(f_table, FunctionType)
+    assert isinstance(local_type(symtab, "f", "c"), IntType)
+
+    # one-line edit, also shifts the lines
+    code = CODE.replace("c = 1", "\n\n    c = [1]")
+    ctx = analysis.update(parse_string(code, "mod"))
+    assert analysis.reanalysed is not None
+    assert [scope.name for scope in analysis.reanalysed] == ["f"]
+    assert module_symbol_table(ctx) is symtab
+    assert symtab["C"].type is C_table
+    assert symtab["f"].type is not f_table
+    assert isinstance(symtab["f"].type, FunctionType)
+    assert isinstance(local_type(symtab, "f", "c"), ListType)
+
+    ctx = analysis.update(parse_string(code, "mod"))
+    assert analysis.reanalysed == []
+
+    # change outside of the scopes
+    ctx = analysis.update(parse_string(code.replace("a = 1", "a = 2"), "mod"))
+    assert analysis.reanalysed is None
+    assert module_symbol_table(ctx) is not symtab
+
+
+def test_def_use_index():
+    code = "def f(a):\n    return f(a)\nf(1)\n"
+    analysis = IncrementalAnalysis()
+
+    ctx = analysis.update(parse_string(code, "mod"))
+    defs = ctx.results["DefinitionAnalyser"]
+    symbol = module_symbol_table(ctx)["f"]
+    symbol.rewind(0)
+    f = symbol.next_def()
+    assert [name.lineno for name in defs.uses_of(f)] == [3]
+    size = (len(defs.definitions), len(defs.uses))
+
+    for i in range(5):
+        module = parse_string(code.replace("return f(a)", f"return f(a + {i})"), "mod")
+        ctx = analysis.update(module)
+        assert analysis.reanalysed is not None and len(analysis.reanalysed) == 1
+        assert ctx.results["DefinitionAnalyser"] is defs
+
+        # the use outside of the scope is kept, the replaced tree is dropped
+        assert [name.lineno for name in defs.uses_of(f)] == [3]
+        assert defs.defined_by(f) is analysis.reanalysed[0]
+        assert (len(defs.definitions), len(defs.uses)) == size
+
+
+def test_fingerprint():
+    code = "if a:\n    def f():\n        return 1\nx = [i for i in y]\n"
+
+    def prints(code):
+        module = parse_string(code, "mod")
+        return fingerprint(module, ScopeCollector().collect(module))
+
+    skeleton, hashes = prints(code)
+    assert len(hashes) == 2
+
+    # scopes in the blocks and in the expressions are not in the skeleton
+    edited = code.replace("return 1", "return 2").replace("in y", "in y if i")
+    new_skeleton, new_hashes = prints(edited)
+    assert new_skeleton == skeleton
+    assert new_hashes[0] != hashes[0] and new_hashes[1] != hashes[1]
+
+    assert prints(code.replace("x =", "z ="))[0] != skeleton
+    assert prints(code.replace("if a", "if b"))[0] != skeleton
+
+
+if __name__ == "__main__":
+    do_test(__file__)
@@ -1,6 +1,6 @@
-from typing import Tuple, Type
+from typing import Tuple, Type, cast
 from pynalyser.types.inheritance import Inheritable, is_subclass, is_type, set_bases
-from pynalyser.types.exceptions import duplicate_base, invalid_mro
+from pynalyser.types.exceptions import duplicate_base, inheritance_cycle, invalid_mro
 from utils import do_test, raises_instance
 
 
@@ -107,6 +107,21 @@ def test_consistency_with_epg():
     )
 
 
+def test_large_hierarchy():
+    # two chains joined at every level, compared with the mro of python
+    left, right = [make_class("L0")], [make_class("R0")]
+    py_left, py_right = [type("L0", (), {})], [type("R0", (), {})]
+    for i in range(1, 500):
+        left.append(make_class(f"L{i}", (left[-1], right[-1])))
+        right.append(make_class(f"R{i}", (right[-1],)))
+        py_left.append(type(f"L{i}", (py_left[-1], py_right[-1]), {}))
+        py_right.append(type(f"R{i}", (py_right[-1],), {}))
+
+    names = [cls.__name__ for cls in cast(Tuple[Type[Inheritable], ...], left[-1].mro)]
+    assert names == [cls.__name__ for cls in py_left[-1].__mro__[:-1]]
+    assert is_subclass(left[-1], (right[0],)) and not is_subclass(right[-1], left[0])
+
+
 def test_mro_disagreement():
     # FIXME: the exact msg is generally considered an impl detail
     # if util.check_impl_detail(): check message
@@ -229,5 +244,40 @@ def test_is_subclass_tuple():
     assert is_subclass(D(), (B(), A()))
 
 
+def test_set_bases_again():
+    A = make_class("A")
+    B = make_class("B")
+    assert not is_subclass(B, A)
+
+    set_bases(B, (A,))
+    assert is_subclass(B, A) and is_subclass(B(), (make_class("C"), A))
+    set_bases(B, ())
+    assert not is_subclass(B, A)
+
+
+def test_set_bases_of_parent():
+    A = make_class("A")
+    B = make_class("B")
+    C = make_class("C", (B,))
+    D = make_class("D", (C, B))
+
+    set_bases(B, (A,))
+    assert C.mro == (C, B, A) and D.mro == (D, C, B, A)
+    assert is_subclass(C, A) and is_subclass(D(), A)
+
+    set_bases(B, ())
+    assert C.mro == (C, B) and D.mro == (D, C, B)
+    assert not is_subclass(C, A) and not is_subclass(D, A)
+
+    with raises_instance(inheritance_cycle()):
+        set_bases(B, (D,))
+
+    # nothing is changed if the mro of a subclass is inconsistent
+    E = make_class("E", (A, C))
+    with raises_instance(invalid_mro(["A", "C"])):
+        set_bases(B, (A,))
+    assert B.mro == (B,) and E.mro == (E, A, C, B)
+
+
 if __name__ == "__main__":
     do_test(__file__)
@@ -0,0 +1,288 @@
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from pynalyser import acr
+from pynalyser.acr import dump
+from pynalyser.analysers.definitions import module_symbol_table
+from pynalyser.cache import ModuleCache
+from pynalyser.main import (
+    analyse_files,
+    analyse_iter,
+    analyse_modules,
+    parse_file,
+    parse_string,
+)
+from pynalyser.types import (
+    AnyType,
+    DataType,
+    FunctionType,
+    IntType,
+    SymbolTableType,
+    UnknownType,
+)
+
+from utils import do_test
+
+
+CODE = """
+a = 1
+def f(b):
+    return b + a
+class C:
+    c = [i for i in range(10)]
+"""
+
+
+def make_files(directory: Path, names: List[str]) -> List[str]:
+    paths = []
+    for name in names:
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(CODE, encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def test_parallel_analysis(tmp_path: Path):
+    paths = make_files(tmp_path, ["c.py", "a.py", "b.py", "d/a.py"])
+
+    ctx = analyse_files(paths, jobs=2)
+
+    assert [module.name for module in ctx.modules] == ["c", "a", "b", "a"]
+    assert ctx.completed == {"SymTabAnalyser", "DefinitionAnalyser", "scopes", "types"}
+    for path, module in zip(paths, ctx.modules):
+        assert dump(module) == dump(parse_file(path))
+
+    symtab = ctx.results["SymTabAnalyser"]
+    assert isinstance(symtab, SymbolTableType)
+    assert list(symtab.keys()) == ["c", "a", "b"]
+
+    # modules with the same name are different definitions of the symbol
+    symbol = symtab["a"]
+    tables = []
+    for _ in range(2):
+        symbol.next_def()
+        table = symbol.type
+        assert isinstance(table, SymbolTableType)
+        tables.append(table)
+        table.reset()
+        table["f"].next_def()
+        assert isinstance(table["f"].type, FunctionType)
+    assert tables[0] is not tables[1]
+
+
+def definition_types(
+    table: SymbolTableType, path: Tuple[str, ...] = ()
+) -> Iterator[Tuple[Tuple[str, ...], DataType]]:
+    """Dereferenced types of all of the definitions in the `table`
+    and the nested tables"""
+
+    for name, symbol in table.items():
+        for definition in symbol._symbols:
+            tp = definition.type
+            if isinstance(tp, SymbolTableType):
+                yield from definition_types(tp, path + (name,))
+            else:
+                yield path + (name,), tp.deref(report=False)
+
+
+def test_serial_and_parallel_analysis(tmp_path: Path):
+    paths = make_files(tmp_path, ["m1.py", "m2.py"])
+
+    serial = analyse_files(paths)
+    parallel = analyse_files(paths, jobs=2)
+
+    assert [module.name for module in serial.modules] == ["m1", "m2"]
+    assert serial.completed == parallel.completed
+    assert list(serial.results["SymTabAnalyser"].keys()) == ["m1", "m2"]
+
+    # the checks by identity should work with the types made by the workers
+    serial_types = list(definition_types(serial.results["SymTabAnalyser"]))
+    parallel_types = list(definition_types(parallel.results["SymTabAnalyser"]))
+    assert [path for path, _ in serial_types] == [path for path, _ in parallel_types]
+    assert any(tp is UnknownType for _, tp in parallel_types)
+    assert any(tp is IntType.make() for _, tp in parallel_types)
+    for (_, tp), (_, other) in zip(serial_types, parallel_types):
+        if tp is UnknownType or tp is AnyType or tp.is_interned:
+            assert other is tp
+        else:
+            assert type(other) is type(tp)
+
+
+def test_instrumented_analysis(tmp_path: Path):
+    paths = make_files(tmp_path, ["m1.py", "m2.py"])
+
+    serial = analyse_files(paths, instrument=True)
+    parallel = analyse_files(paths, jobs=2, instrument=True)
+    assert analyse_files(paths).stats == []
+
+    for ctx in (serial, parallel):
+        assert [(stats.module, stats.analyser) for stats in ctx.stats] == [
+            (module, analyser)
+            for module in ("m1", "m2")
+            for analyser in ("SymTabAnalyser", "ScopeAnalyser", "TypeInference")
+        ]
+    assert [stats.visits for stats in serial.stats] == [
+        stats.visits for stats in parallel.stats
+    ]
+
+
+class NameCollector(acr.NodeVisitor):
+    def __init__(self) -> None:
+        self.names: list = []
+
+    def visit_Name(self, node: acr.ast.Name) -> None:
+        self.names.append(node)
+
+
+def test_def_use_index():
+    module = parse_string("x = 1\nprint(x)\nx = 2\nx\ndef f(y):\n    return y\n")
+    defs = analyse_modules([module]).results["DefinitionAnalyser"]
+
+    collector = NameCollector()
+    collector.start(module)
+    x1, print_, x1_use, x2, x2_use, y_use = collector.names
+
+    first = defs.definition_of(x1)
+    assert defs.definition_of(x1_use) is first
+    assert defs.uses_of(first) == [x1, x1_use]
+    assert isinstance(defs.defined_by(first), acr.ast.Assign)
+
+    second = defs.definition_of(x2_use)
+    assert second is not first and defs.uses_of(second) == [x2, x2_use]
+
+    # placeholder definition of the undefined name and the argument
+    assert defs.uses_of(defs.definition_of(print_)) == [print_]
+    assert defs.defined_by(defs.definition_of(print_)) is None
+    assert defs.definition_of(y_use).is_arg
+    assert defs.defined_by(defs.definition_of(y_use)) is None
+
+
+def test_def_use_index_reassignment():
+    module = parse_string("x = 1\nx = x + 1\nx += x\n")
+    ctx = analyse_modules([module])
+    defs = ctx.results["DefinitionAnalyser"]
+
+    collector = NameCollector()
+    collector.start(module)
+    x1, x2, x1_use, x3, x2_use = collector.names
+    assert [(name.lineno, name.col_offset) for name in (x1_use, x2_use)] == [
+        (2, 4),
+        (3, 5),
+    ]
+
+    # the value is evaluated before the target is bound
+    first, second, third = map(defs.definition_of, (x1, x2, x3))
+    assert defs.definition_of(x1_use) is first and defs.uses_of(first) == [x1, x1_use]
+    assert defs.definition_of(x2_use) is second
+    assert isinstance(defs.defined_by(second), acr.ast.Assign)
+    assert isinstance(defs.defined_by(third), acr.ast.AugAssign)
+    assert len({id(first), id(second), id(third)}) == 3
+
+    # and the types are not referring to themselves
+    symbol = module_symbol_table(ctx)["x"]
+    symbol.rewind(1)
+    assert symbol.next_def().type.deref(report=False) is IntType.make()
+
+
+def test_def_use_index_in_parallel(tmp_path: Path):
+    paths = make_files(tmp_path, ["m1.py", "m2.py"])
+    ctx = analyse_files(paths, jobs=2)
+    defs = ctx.results["DefinitionAnalyser"]
+
+    names = []
+    for module in ctx.modules:
+        collector = NameCollector()
+        collector.start(module)
+        names.extend(collector.names)
+    assert len(defs.definitions) == len(names)
+
+    symtab = ctx.results["SymTabAnalyser"]
+    for module in ctx.modules:
+        collector = NameCollector()
+        collector.start(module)
+        a, *_ = collector.names
+
+        # the definition is in the symbol table of it's module
+        definition = defs.definition_of(a)
+        assert definition is not None and defs.uses_of(definition)[0] is a
+        module_symbol = symtab[module.name]
+        module_symbol.rewind(0)
+        table = module_symbol.next_def().type
+        assert isinstance(table, SymbolTableType)
+        table["a"].rewind(0)
+        assert table["a"].next_def() is definition
+
+
+def test_analyse_iter(tmp_path: Path):
+    paths = make_files(tmp_path, ["a.py", "b.py", "c.py"])
+    consumed = []
+
+    def iter_paths():
+        for path in paths:
+            consumed.append(path)
+            yield path
+
+    results = analyse_iter(iter_paths())
+    assert consumed == []
+
+    for i, ctx in enumerate(results):
+        assert consumed == paths[: i + 1]
+        assert [module.name for module in ctx.modules] == ["abc"[i]]
+        assert list(ctx.results["SymTabAnalyser"].keys()) == ["abc"[i]]
+
+
+def test_cache(tmp_path: Path):
+    cache = ModuleCache(str(tmp_path / "cache"))
+
+    module = parse_string(CODE, "first", cache)
+    assert cache.stats.misses == 1 and cache.stats.hits == 0
+    assert cache.stats.bytes_written == cache.stats.size > 0
+
+    cached = parse_string(CODE, "second", cache)
+    assert cache.stats.misses == 1 and cache.stats.hits == 1
+    assert cache.stats.bytes_read == cache.stats.bytes_written
+    assert cached is not module
+    assert cached.name == "second"
+    module.name = "second"
+    assert dump(cached, include_attributes=True) == dump(
+        module, include_attributes=True
+    )
+
+    # cache is persistent
+    cache = ModuleCache(str(tmp_path / "cache"))
+    assert cache.stats.size > 0
+    assert parse_string(CODE, "third", cache).name == "third"
+    assert cache.stats.hits == 1
+
+
+def test_cache_eviction(tmp_path: Path):
+    cache = ModuleCache(str(tmp_path / "cache"), max_size=None)
+    for i in range(5):
+        parse_string(CODE + f"\nx = {i}", cache=cache)
+    entry_size = cache.stats.size // 5
+
+    cache.max_size = entry_size * 3
+    parse_string(CODE + "\nx = 0", cache=cache)  # now the most recent one
+    parse_string(CODE + "\nx = 5", cache=cache)
+    # evicted under the low water mark, so the next entry fits without eviction
+    assert cache.stats.size <= cache.max_size * cache.low_water
+    assert cache.stats.bytes_evicted > 0
+
+    hits = cache.stats.hits
+    parse_string(CODE + "\nx = 0", cache=cache)
+    parse_string(CODE + "\nx = 5", cache=cache)
+    assert cache.stats.hits == hits + 2
+
+    cache.clear()
+    assert cache.stats.size == 0
+
+    # rewritten entry is not counted twice
+    module = parse_string(CODE, cache=cache)
+    size = cache.stats.size
+    cache.put(CODE, module)
+    assert cache.stats.size == size
+
+
+if __name__ == "__main__":
+    do_test(__file__)
@@ -0,0 +1,190 @@
+import sys
+from typing import List
+
+import pytest
+
+from pynalyser import acr, ast
+from pynalyser.analysers import (
+    Analyser,
+    AnalysisContext,
+    TypeInference,
+)
+from pynalyser.analysers.definitions import module_symbol_table
+from pynalyser.analysers.pipeline import (
+    default_pipe,
+    insert_in_pipeline,
+    run_pipeline,
+    schedule,
+)
+from pynalyser.analysers.tools import FusedAnalyser, fuse_analysers
+from pynalyser.main import parse_string
+from pynalyser.types import IntType
+
+from utils import do_test
+
+
+CODE = """
+a = b
+def f(c):
+    return [d for d in c]
+class C:
+    e = f(a)
+"""
+
+
+class NameLogger(Analyser):
+    def prepare(self, ctx: AnalysisContext) -> None:
+        super().prepare(ctx)
+        self.log: List[tuple] = ctx.results.setdefault(type(self).__name__, [])
+
+    def visit_Name(self, node: ast.Name) -> None:
+        self.log.append((node.id, self.scope.name, type(self.block).__name__))
+
+
+class CallLogger(NameLogger):
+    def visit_Call(self, node: ast.Call) -> None:
+        # sees what was logged for this node by the previous analysers
+        self.log.append(("call", len(self.context.results["FusableNameLogger"])))
+
+
+class FusableNameLogger(NameLogger):
+    fusable = True
+
+
+class FusableCallLogger(CallLogger):
+    fusable = True
+
+
+def test_fuse_analysers():
+    first, second, third = FusableNameLogger(), FusableCallLogger(), NameLogger()
+
+    analysers = fuse_analysers([first, second, third])
+    assert len(analysers) == 2
+    assert isinstance(analysers[0], FusedAnalyser)
+    assert analysers[0].analysers == [first, second]
+    assert analysers[1] is third
+
+    assert fuse_analysers([first, third]) == [first, third]
+    assert not any(analyser.fusable for analyser in default_pipe())
+
+
+def test_fused_walk():
+    module = parse_string(CODE)
+
+    separate = run_pipeline(
+        AnalysisContext([module]), lambda: [FusableNameLogger(), CallLogger()]
+    )
+    fused = run_pipeline(
+        AnalysisContext([module]), lambda: [FusableNameLogger(), FusableCallLogger()]
+    )
+
+    names = fused.results["FusableNameLogger"]
+    assert names == separate.results["FusableNameLogger"]
+    assert ("d", "<listcomp>", "ListComp") in names
+    assert ("a", "C", "Class") in names
+
+    calls = fused.results["FusableCallLogger"]
+    assert [log for log in calls if log[0] != "call"] == names
+    assert calls[-3] == ("call", len(names) - 2)
+
+
+class Stage(Analyser):
+    def __init__(self, name: str, requires=None, provides=()) -> None:
+        self.name = name
+        self.requires = requires
+        self.provides = provides
+
+    def analyse(self, ctx: AnalysisContext) -> None:
+        ctx.results.setdefault("order", []).append(self.name)
+
+
+def names(pipeline: List[Analyser]) -> List[str]:
+    return [analyser.name for analyser in pipeline]  # type: ignore
+
+
+def test_schedule():
+    ctx = AnalysisContext([])
+    pipeline: List[Analyser] = [
+        Stage("c", ("b",), ("c",)),
+        Stage("undeclared"),
+        Stage("a", (), ("a",)),
+        Stage("b", ("a",), ("b",)),
+        Stage("d", ("a",), ("d",)),
+    ]
+
+    assert names(schedule(ctx, pipeline)) == ["a", "b", "c", "undeclared", "d"]
+
+    ctx.completed.update(("a", "b"))
+    assert names(schedule(ctx, pipeline)) == ["c", "undeclared", "d"]
+
+    with pytest.raises(ValueError, match="'x' is required by Stage"):
+        schedule(AnalysisContext([]), [Stage("y", ("x",), ("y",))])
+
+    with pytest.raises(ValueError, match="cyclic"):
+        cycle: List[Analyser] = [Stage("a", ("b",), ("a",)), Stage("b", ("a",), ("b",))]
+        schedule(AnalysisContext([]), cycle)
+
+
+class Finisher(Stage):
+    def analyse(self, ctx: AnalysisContext) -> None:
+        super().analyse(ctx)
+        symtab = ctx.results["SymTabAnalyser"]
+        ctx.results["f type"] = symtab["<unknown>"].type["f"].type
+
+
+def test_skip_completed():
+    ctx = run_pipeline(AnalysisContext([parse_string(CODE)]), default_pipe)
+    assert ctx.completed == {"SymTabAnalyser", "DefinitionAnalyser", "scopes", "types"}
+    symtab = ctx.results["SymTabAnalyser"]
+
+    # only the new analyser is run
+    run_pipeline(
+        ctx,
+        lambda: insert_in_pipeline(
+            default_pipe(), Finisher("finisher", ("types",)), "after", TypeInference
+        ),
+    )
+    assert ctx.results["order"] == ["finisher"]
+    assert ctx.results["SymTabAnalyser"] is symtab
+    assert ctx.results["f type"] is symtab["<unknown>"].type["f"].type
+
+
+def test_instrument():
+    module = parse_string(CODE)
+    ctx = run_pipeline(AnalysisContext([module]), default_pipe, instrument=True)
+
+    assert [stats.analyser for stats in ctx.stats] == [
+        "SymTabAnalyser",
+        "ScopeAnalyser",
+        "TypeInference",
+    ]
+    for stats in ctx.stats:
+        assert stats.module == "<unknown>"
+        assert stats.wall_time > 0 and stats.cpu_time >= 0
+        assert stats.memory_peak >= 0
+    # every node, the iterative traversal counts them as the recursive one
+    walker = acr.NodeVisitor()
+    walker.start(module)
+    assert ctx.stats[0].visits == ctx.stats[1].visits == walker.visits > 10
+
+    analysers: List[Analyser] = [FusableNameLogger(), FusableCallLogger()]
+    fused = run_pipeline(AnalysisContext([module]), lambda: analysers, instrument=True)
+    assert len(fused.stats) == 1
+    assert fused.stats[0].analyser == "FusableNameLogger+FusableCallLogger"
+    assert fused.stats[0].visits == 2 * ctx.stats[0].visits
+
+    assert run_pipeline(AnalysisContext([module]), default_pipe).stats == []
+
+
+def test_deep_expression():
+    # the recursion would take several frames per operand
+    depth = sys.getrecursionlimit() // 3
+    module = parse_string("a = 1\nb = " + " + ".join(["a"] * depth) + "\n")
+    ctx = run_pipeline(AnalysisContext([module]), default_pipe)
+
+    symtab = module_symbol_table(ctx)
+    assert symtab["b"].current_symbol.type.deref(report=False) is IntType.make()
+
+
+if __name__ == "__main__":
+    do_test(__file__)
@@ -1,9 +1,13 @@
 from pynalyser.types import *
 from pynalyser.analysers.type_inference import CMPOP, BINOP
 
-from utils import do_test
+from pynalyser.symbol import Symbol
+from pynalyser.types.exceptions import binary_not_supported
+
+from utils import do_test, raises_instance
 
 import operator
+import pickle
 
 # you cannot overwrite 'is' and True/False != BoolType :(
 # operator.__is__ = operator.is_  # type: ignore[attr-defined]
@@ -71,5 +75,118 @@ def test_tuple():
     assert SubscriptType(tpl, SliceType()).deref(True) is AnyType
 
 
+def test_interned():
+    assert IntType.make() is IntType.make(name="int", is_builtin=True)
+    assert IntType.make() is not IntType() and IntType.make() is not BoolType.make()
+    assert DataType.make(name="str", is_builtin=True) is DataType.make(
+        is_builtin=True, name="str"
+    )
+    rng = IterableType.make(item_type=IntType.make(), is_builtin=False)
+    assert rng is IterableType.make(item_type=IntType.make(), is_builtin=False)
+    assert CallType(SymbolType("range", Symbol()), (), ()).deref(True) is rng
+
+    # results of the operations are shared
+    assert (IntType() + IntType()) is IntType.make()
+    assert (IntType() < IntType()) is BoolType.make()
+
+    # hashed by identity, the operation `__eq__` is never called
+    assert len({IntType.make(), IntType.make(), BoolType.make()}) == 2
+    assert len({IntType(), IntType()}) == 1
+
+
+def test_union():
+    int_, bool_, float_ = IntType.make(), BoolType.make(), FloatType.make()
+    ref = PynalyserType()
+
+    union = UnionType(float_, UnionType(int_, ref), UnionType(int_, bool_), ref)
+    assert union.types == (bool_, float_, int_, ref)
+    assert union == UnionType(ref, bool_, int_, float_)
+    assert UnionType(int_, AnyType, ref).types == (AnyType,)
+
+    wide_members = [DataType.make(name=str(i), is_builtin=False) for i in range(20)]
+    assert UnionType(*wide_members).types == (AnyType,)
+
+    # the references are not resolved yet, so they don't count towards the width
+    symbol = Symbol(type=int_)
+    refs = [BinOpType(SymbolType("x", symbol), "add", int_) for _ in range(20)]
+    union = UnionType(*refs, bool_)
+    assert union.types == (bool_, *refs)
+    assert UnionType(*refs).deref(report=False) is int_
+    assert UnionType(*refs, *wide_members).types == (AnyType,)
+    assert common_supertype([int_, bool_]) is int_
+    assert common_supertype([bool_, float_]) is AnyType
+
+
+def test_pickle_interned():
+    lst = ListType.make(item_type=IntType.make(), is_builtin=True)
+    copies = pickle.loads(pickle.dumps((IntType.make(), lst, AnyType)))
+    assert copies == (IntType.make(), lst, AnyType) and copies[0] is IntType.make()
+    assert hash(copies[1]) == hash(lst) and copies[1].is_interned
+
+    # the id-keyed cache of the results gets only the interned instances
+    assert (copies[0] + IntType()) is IntType.make()
+    assert (copies[0] < copies[0]) is BoolType.make()
+
+    other = ListType(item_type=IntType.make(), is_builtin=True)
+    other = pickle.loads(pickle.dumps(other))
+    assert not other.is_interned and other.item_type is IntType.make()
+
+
+def test_memoised_deref():
+    symbol = Symbol(type=IntType.make())
+    lst = ListType(item_type=IntType.make(), is_builtin=True)
+    subscript = SubscriptType(lst, IntType.make())
+    assert subscript.deref(report=True) is IntType.make()
+    # the change of the field of the nested type is seen too
+    lst.item_type = FloatType.make()
+    assert subscript.deref(report=True) is FloatType.make()
+
+    add = BinOpType(SymbolType("a", symbol), "add", IntType.make())
+    assert add.deref(report=True) is IntType.make()
+    symbol.type = FloatType.make()
+    assert add.deref(report=True) is FloatType.make()
+
+    # the result without the reports is not reused when they are needed
+    matmul = BinOpType(SymbolType("a", symbol), "matmul", IntType.make())
+    assert matmul.deref(report=False) is AnyType
+    with raises_instance(binary_not_supported("matmul", "float", "int")):
+        matmul.deref(report=True)
+
+
+def test_memoised_deref_per_table():
+    table, other = SymbolTableType(name="a"), SymbolTableType(name="b")
+    table["a"].next_def().type = IntType.make()
+    other["b"].next_def()
+
+    add = BinOpType(SymbolType("a", table.current_symbol("a")), "add", IntType.make())
+    assert add.deref(report=True) is IntType.make()
+    memo = add._deref_memo
+
+    # it has not seen the symbols of the other table
+    other.current_symbol("b").type = FloatType.make()
+    assert add.deref(report=True) is IntType.make()
+    assert add._deref_memo is memo
+
+    table.current_symbol("a").type = FloatType.make()
+    assert add.deref(report=True) is FloatType.make()
+
+
+def test_resolution_cache():
+    int_, float_ = IntType.make(), FloatType.make()
+    calls = BinOpType.prepare_calls(int_, "add", float_)
+    assert BinOpType.prepare_calls(IntType(), "add", FloatType()) is calls
+
+    class CustomType(IntType):
+        pass
+
+    set_bases(CustomType, (IntType,))
+    CustomType.ops = IntType.ops.copy()
+
+    expr = BinOpType(CustomType.make(), "add", int_)
+    assert expr.deref(report=True) is int_
+    set_op(CustomType, Op(lambda this, value: float_, (int_,)), "__add__")
+    assert expr.deref(report=True) is float_
+
+
 if __name__ == "__main__":
     do_test(__file__)
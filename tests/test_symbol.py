@@ -0,0 +1,80 @@
+import pickle
+
+from pynalyser.symbol import MultiDefSymbol
+from pynalyser.types import IntType, SymbolTableType
+
+from utils import do_test
+
+
+def test_reset():
+    table = SymbolTableType(name="test")
+    a, b = table["a"], table["b"]
+    a.next_def()
+    a.next_def()
+    b.next_def()
+    first = a.current_symbol
+
+    table.reset()
+    assert not a.is_currently_defined and not b.is_currently_defined
+    a.next_def()
+    assert a.current_symbol is not first
+    assert not b.is_currently_defined
+
+    # definitions are kept
+    a.rewind(1)
+    a.next_def()
+    assert a.current_symbol is first
+
+    table.reset()
+    table.reset()
+    b.next_def()
+    assert b.is_currently_defined and not a.is_currently_defined
+
+
+def test_slots():
+    table = SymbolTableType(name="test")
+    for name in "abc":
+        table[name].next_def()
+    table["b"].next_def()
+
+    slots = table.symbol_slots
+    assert [table[name]._slot for name in "abc"] == [0, 1, 2]
+    assert [len(definitions) for definitions in slots.definitions] == [1, 2, 1]
+    assert table["b"].current_symbol is slots.definitions[1][1]
+
+
+def test_direct_access():
+    table = SymbolTableType(name="test")
+    symbol = table["a"].next_def()
+    assert table.current_symbol("a") is table["a"].current_symbol is symbol
+
+    symbol.type = IntType()
+    assert table["a"].type is symbol.type
+    table["a"].imported = True
+    assert symbol.imported
+
+
+def test_standalone_symbol():
+    symbol = MultiDefSymbol()
+    symbol.next_def()
+    symbol.type = IntType()
+    assert isinstance(symbol.type, IntType)
+    symbol.reset()
+    assert not symbol.is_currently_defined
+
+
+def test_pickle_table():
+    table = SymbolTableType(name="test")
+    table["a"].next_def()
+    table["a"].type = IntType()
+
+    copy = pickle.loads(pickle.dumps(table))
+    assert copy["a"]._slots is copy.symbol_slots
+    assert isinstance(copy["a"].type, IntType)
+    copy.reset()
+    assert not copy["a"].is_currently_defined
+    assert table["a"].is_currently_defined
+
+
+if __name__ == "__main__":
+    do_test(__file__)